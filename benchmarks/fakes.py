@@ -0,0 +1,283 @@
+"""Offline stand-ins for Gemini, Tavily and the news feeds, replaying the recorded payloads in fixtures/.
+
+Every backend sleeps for a configurable (jittered) latency, fails a configurable fraction of calls the
+way the real provider would, and counts what it served. Only the transport is replaced: the agents,
+provider schedulers, feed parsers and context packing all run unchanged.
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+import httpx
+import requests
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+NEWSAPI_HOST = "newsapi.org"
+FEED_URL = "https://feeds.bench.local/{index}/rss.xml"
+
+# Five independent slots: two synthetic headlines only share enough words to look alike (4 of 5) by
+# rare accident, so dedup does real work without collapsing large inputs
+_SUBJECTS = ["Ministers", "Regulators", "Lawmakers", "Investors", "Rescuers", "Protesters", "Doctors", "Farmers",
+             "Diplomats", "Engineers", "Unions", "Scientists", "Generals", "Voters", "Airlines", "Retailers",
+             "Insurers", "Teachers", "Refugees", "Governors", "Courts", "Exporters", "Hospitals", "Miners",
+             "Automakers", "Bankers", "Police", "Students", "Pilots", "Shippers"]
+_VERBS = ["approve", "reject", "delay", "expand", "suspend", "challenge", "finalise", "debate", "target", "boost",
+          "cut", "probe", "defend", "review", "unveil", "block", "fund", "restart", "extend", "scrap",
+          "ease", "tighten", "protest", "back", "question", "halt", "launch", "revive", "secure", "contest"]
+_ADJECTIVES = ["emergency", "landmark", "disputed", "regional", "fragile", "sweeping", "temporary", "costly",
+               "historic", "contested", "urgent", "bilateral", "overdue", "controversial", "ambitious", "modest",
+               "secret", "revised", "national", "crossborder", "record", "rare", "unexpected", "interim",
+               "binding", "voluntary", "strict", "phased", "joint", "longawaited"]
+_OBJECTS = ["ceasefire", "budget", "tariffs", "sanctions", "reforms", "subsidies", "rescue", "treaty", "pipeline",
+            "elections", "vaccines", "exports", "strike", "merger", "curfew", "loans", "aid", "inquiry", "mission",
+            "quotas", "pensions", "recount", "blockade", "bailout", "levies", "evacuations", "stockpiles", "visas",
+            "rations", "talks"]
+_PLACES = ["Nairobi", "Lima", "Hanoi", "Oslo", "Dhaka", "Quito", "Accra", "Riga", "Manila", "Tbilisi", "Santiago",
+           "Lagos", "Warsaw", "Cairo", "Jakarta", "Bogota", "Ankara", "Dakar", "Lisbon", "Seoul", "Karachi",
+           "Montreal", "Kyiv", "Perth", "Algiers", "Tunis", "Vienna", "Mumbai", "Havana", "Osaka"]
+_SOURCES = ["Reuters", "Associated Press", "BBC News", "Al Jazeera", "Bloomberg", "The Guardian", "NPR", "CNN",
+            "Financial Times", "Deutsche Welle", "Nikkei Asia", "The Hindu"]
+
+class ServiceUnavailable(Exception):
+    """Injected failure. Carries a 503 code, so the provider schedulers retry it like a real outage."""
+    code = 503
+
+class Backend:
+    """Latency, failure injection and call counting shared by the fake providers."""
+
+    def __init__(self, name: str, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, bool]:
+        """Latency of the next call and whether it fails, drawn reproducibly from the seed."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * self._random.uniform(0.5, 1.5) if self.latency else 0.0
+            failed = self._random.random() < self.failure_rate
+            self.failures += failed
+        return delay, failed
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "failures": self.failures}
+
+def _load(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def recorded_items() -> List[Dict[str, str]]:
+    """Headlines from the recorded RSS and NewsAPI payloads, in the shape both formats share."""
+    items = []
+    for item in ET.fromstring(_load("rss.xml")).iter("item"):
+        items.append({"title": item.findtext("title"), "url": item.findtext("link"),
+                      "source": item.findtext("source"), "published": item.findtext("pubDate")})
+    for article in json.loads(_load("newsapi.json"))["articles"]:
+        items.append({"title": article["title"], "url": article["url"],
+                      "source": article["source"]["name"], "published": article["publishedAt"]})
+    return items
+
+def synthetic_items(count: int, duplicate_rate: float = 0.2, seed: int = 0) -> List[Dict[str, str]]:
+    """`count` headlines: the recorded ones first, then generated ones.
+
+    About `duplicate_rate` of the generated headlines re-run an earlier story under another publisher,
+    as aggregators do, so the dedup stage has clusters to merge.
+    """
+    rng = random.Random(seed)
+    items = recorded_items()[:count]
+    while len(items) < count:
+        n = len(items)
+        source = rng.choice(_SOURCES)
+        if items and rng.random() < duplicate_rate:
+            base = re.sub(r"\s+-\s+[^-]+$", "", rng.choice(items)["title"])
+            title = f"{base} - {source}"
+        else:
+            title = (f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_ADJECTIVES)} "
+                     f"{rng.choice(_OBJECTS)} in {rng.choice(_PLACES)} - {source}")
+        hour, minute = divmod(n % 1440, 60)
+        items.append({"title": title, "url": f"https://news.bench.local/story/{n}", "source": source,
+                      "published": f"Mon, 12 Oct 2026 {23 - hour % 24:02d}:{59 - minute:02d}:00 GMT"})
+    return items
+
+def render_rss(items: List[Dict[str, str]]) -> bytes:
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel><title>Bench feed</title>']
+    for item in items:
+        parts.append(f"<item><title>{escape(item['title'])}</title><link>{escape(item['url'])}</link>"
+                     f"<pubDate>{item['published']}</pubDate><source>{escape(item['source'])}</source></item>")
+    parts.append("</channel></rss>\n")
+    return "".join(parts).encode("utf-8")
+
+def render_newsapi(items: List[Dict[str, str]]) -> bytes:
+    articles = [{"source": {"id": None, "name": item["source"]}, "title": item["title"], "url": item["url"],
+                 "publishedAt": item["published"], "description": item["title"]} for item in items]
+    return json.dumps({"status": "ok", "totalResults": len(articles), "articles": articles}).encode("utf-8")
+
+class FeedBackend(Backend):
+    """Serves one NewsAPI query and `feeds` RSS feeds that together hold `count` headlines."""
+
+    def __init__(self, count: int, feeds: int = 3, duplicate_rate: float = 0.2, **kwargs):
+        super().__init__("feeds", **kwargs)
+        items = synthetic_items(count, duplicate_rate, seed=kwargs.get("seed", 0))
+        shares = [items[i::feeds + 1] for i in range(feeds + 1)]
+        self.newsapi = render_newsapi(shares[0])
+        self.newsapi_items = len(shares[0])
+        self.rss = {FEED_URL.format(index=i): render_rss(share) for i, share in enumerate(shares[1:])}
+        self.rss_items = max((len(share) for share in shares[1:]), default=0)
+
+    def sources(self) -> List[dict]:
+        """Source registry entries (config.yaml `sources` format) covering every served headline."""
+        specs = [{"type": "newsapi", "query": "bench", "max_items": max(1, self.newsapi_items)}]
+        specs += [{"type": "rss", "url": url, "name": f"Bench feed {i}", "max_items": max(1, self.rss_items)}
+                  for i, url in enumerate(self.rss)]
+        return specs
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        delay, failed = self.draw()
+        await asyncio.sleep(delay)
+        if failed:
+            return httpx.Response(503, request=request)
+        if request.url.host == NEWSAPI_HOST:
+            return httpx.Response(200, content=self.newsapi, headers={"Content-Type": "application/json"})
+        body = self.rss.get(str(request.url))
+        if body is None:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/rss+xml"})
+
+    def client_factory(self):
+        """Drop-in for httpx.AsyncClient that routes every request to this backend."""
+        backend = self
+
+        class BenchAsyncClient(httpx.AsyncClient):
+            def __init__(self, **kwargs):
+                super().__init__(transport=httpx.MockTransport(backend.handle), **kwargs)
+        return BenchAsyncClient
+
+class _Response:
+    """Just enough of requests.Response for the research service."""
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error", response=self)
+
+class SearchBackend(Backend):
+    """Tavily search replayed from fixtures/tavily_search.json; results mention the query so each trend's
+    research context differs."""
+
+    def __init__(self, **kwargs):
+        super().__init__("search", **kwargs)
+        self.recorded = json.loads(_load("tavily_search.json"))
+
+    def post(self, url: str, **kwargs) -> _Response:
+        delay, failed = self.draw()
+        time.sleep(delay)
+        if failed:
+            return _Response(503, b"")
+        payload = kwargs.get("json") or {}
+        query = payload.get("query", "")
+        results = [{**r, "content": f"{query}. {r['content']}", "raw_content": f"{query}. {r['raw_content']}"}
+                   for r in self.recorded["results"][:payload.get("max_results", 5)]]
+        return _Response(200, json.dumps({**self.recorded, "query": query, "results": results}).encode("utf-8"))
+
+    def get(self, url: str, **kwargs) -> _Response:
+        """Scraping fallback for trends whose search failed: a page built from the recorded snippets."""
+        delay, failed = self.draw()
+        time.sleep(delay)
+        if failed:
+            return _Response(503, b"")
+        paragraphs = "".join(f"<p>{escape(r['content'])}</p>" for r in self.recorded["results"])
+        return _Response(200, f"<html><body>{paragraphs}</body></html>".encode("utf-8"))
+
+class GeminiBackend(Backend):
+    """Answers each agent's prompt with a well-formed response, recognised by the prompt's wording."""
+
+    TASKS = (("select the top", "selection"), ("research context about", "research"),
+             ("investigative journalist", "generation"), ("fact-checking editor", "verification"),
+             ("journalism professor", "evaluation"))
+
+    def __init__(self, fail_verification_rate: float = 0.0, **kwargs):
+        super().__init__("gemini", **kwargs)
+        self.fail_verification_rate = fail_verification_rate
+        self.prompts: Dict[str, Dict[str, int]] = {}
+
+    def _task(self, prompt: str) -> str:
+        return next((task for marker, task in self.TASKS if marker in prompt), "other")
+
+    def _answer(self, task: str, prompt: str) -> object:
+        if task == "selection":
+            count = int(re.search(r"select the top (\d+)", prompt).group(1))
+            ids = re.findall(r"- \[(t[0-9a-f]+)\] ", prompt)[:count]
+            return [{"id": i, "title": "", "weighted_score": round(9.0 - rank * 0.5, 2), "justification": "Benchmark pick"}
+                    for rank, i in enumerate(ids)]
+        if task == "research":
+            title = re.search(r'research context about "(.+?)"', prompt).group(1)
+            return [f"{title} official statement", f"{title} figures"]
+        if task == "generation":
+            title = re.search(r'news article about "(.+?)"', prompt).group(1)
+            words = int(re.search(r"Write a (\d+) word", prompt).group(1))
+            urls = re.findall(r"https?://\S+", prompt.split("AVAILABLE SOURCE URLS")[1].split("STRUCTURE:")[0])
+            body = " ".join(f"Paragraph {i // 50 + 1} sentence." if i % 50 == 0 else "report" for i in range(words))
+            return {"title": title, "category": "Politics", "summary": f"{title}. Officials responded.",
+                    "article_body": f"# {title}\n\n{body}", "sources": urls[:3]}
+        if task == "verification":
+            with self._lock:
+                failed = self._random.random() < self.fail_verification_rate
+            claim = {"claim": "Negotiators met for a third day", "is_verified": not failed, "source_url": None,
+                     "reasoning": "Checked against the snippets"}
+            return {"hallucination_check": "Fail" if failed else "Pass", "claims": [claim],
+                    "critique": "Remove the unsupported figure." if failed else ""}
+        if task == "evaluation":
+            return {"average_score": 8.0, "justification": "Benchmark"}
+        return {}
+
+    def generate_content(self, prompt: str, generation_config=None, **kwargs):
+        delay, failed = self.draw()
+        time.sleep(delay)
+        if failed:
+            raise ServiceUnavailable("503 The model is overloaded. Please try again later.")
+        task = self._task(prompt)
+        text = json.dumps(self._answer(task, prompt))
+        with self._lock:
+            seen = self.prompts.setdefault(task, {"calls": 0, "prompt_chars": 0, "max_prompt_chars": 0})
+            seen["calls"] += 1
+            seen["prompt_chars"] += len(prompt)
+            seen["max_prompt_chars"] = max(seen["max_prompt_chars"], len(prompt))
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def module(self):
+        """Stand-in for the google.generativeai module."""
+        backend = self
+        return SimpleNamespace(configure=lambda **kwargs: None,
+                               GenerativeModel=lambda model_name, **kwargs: backend,
+                               types=SimpleNamespace(GenerationConfig=dict))
+
+def install(gemini: GeminiBackend, search: SearchBackend, feeds: FeedBackend) -> None:
+    """Route the pipeline's Gemini, Tavily and feed traffic to the fake backends."""
+    from src.core import llm
+    from src.services import ingestion, research
+
+    for name in ("GEMINI_API_KEY", "TAVILY_API_KEY", "NEWS_API_KEY"):
+        os.environ.setdefault(name, "bench")
+    genai = gemini.module()
+    llm._genai = lambda: genai
+    research.requests = SimpleNamespace(post=search.post, get=search.get)
+    ingestion.httpx = SimpleNamespace(Limits=httpx.Limits, AsyncClient=feeds.client_factory())
@@ -0,0 +1,77 @@
+"""Cold-start benchmark: how long entry points take to import in a fresh interpreter.
+
+Each measurement runs in a new subprocess so nothing is cached in sys.modules. Run from anywhere:
+
+    python benchmarks/import_time.py [--repeat 5] [--compile] [--top 15]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ["src.core.graph", "src.core.runner", "src.api.main", "main"]
+HEAVY = ["sklearn", "scipy", "langgraph.graph", "google.generativeai", "bs4", "httpx", "fastapi"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {target}
+imported = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+compiled = None
+if {compile}:
+    from src.core.graph import get_graph
+    start = time.perf_counter()
+    get_graph()
+    compiled = time.perf_counter() - start
+print(json.dumps({{"import": imported, "compile": compiled, "loaded": loaded}}))
+"""
+
+def measure(target: str, compile_graph: bool) -> dict:
+    code = PROBE.format(target=target, compile=compile_graph, heavy=HEAVY)
+    # Run from outside the repo so any working-directory assumptions show up as failures
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=os.path.expanduser("~"),
+                            env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def top_imports(target: str, count: int) -> list:
+    """Slowest modules by cumulative import time, from `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {target}"],
+                            cwd=os.path.expanduser("~"), env={**os.environ, "PYTHONPATH": ROOT},
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compile", action="store_true", help="Also time the first get_graph() call")
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports of each target")
+    parser.add_argument("--targets", nargs="*", default=TARGETS)
+    args = parser.parse_args()
+
+    print(f"{'target':<18} {'import (median)':>16} {'min':>8} {'compile':>9}  heavy modules loaded by the import")
+    for target in args.targets:
+        runs = [measure(target, args.compile) for _ in range(args.repeat)]
+        imports = [r["import"] for r in runs]
+        compiled = [r["compile"] for r in runs if r["compile"] is not None]
+        compile_col = f"{statistics.median(compiled):8.3f}s" if compiled else f"{'-':>9}"
+        print(f"{target:<18} {statistics.median(imports):15.3f}s {min(imports):7.3f}s {compile_col}  "
+              f"{', '.join(runs[-1]['loaded']) or '-'}")
+        if args.top:
+            for cumulative, name in top_imports(target, args.top):
+                print(f"    {cumulative / 1e6:7.3f}s  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Offline end-to-end benchmark: per-stage timings, call counts and peak memory of the full pipeline.
+
+Gemini, Tavily and the news feeds are replaced by the fakes in fakes.py, which replay the recorded
+payloads in fixtures/ with artificial latency and failure injection, so runs need no API keys or network
+and are comparable between commits. Each input size runs in a fresh interpreter against a throwaway
+config and data directory. Run from anywhere:
+
+    python benchmarks/pipeline.py [--sizes 10 100 1000 10000] [--llm-latency 0.2] [--failure-rate 0.05]
+                                  [--json results.json] [--baseline previous.json]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [10, 100, 1000, 10000]
+STAGES = ["ingest", "dedup", "select", "research", "generate", "verify", "refine", "evaluate"]
+
+def bench_config(feeds, region: str, args) -> dict:
+    """The repo's config.yaml with caches and checkpoints off, the fake sources, and provider limits
+    high enough that the schedulers only add their retry behaviour, not real-world throttling."""
+    import yaml
+    with open(os.path.join(ROOT, "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config["sources"] = {region: feeds.sources()}
+    config["default_region"] = region
+    config["checkpoints"]["enabled"] = False
+    config["coverage_index"]["enabled"] = not args.no_coverage_index
+    for section in (config["ingestion"], config["llm"], config["search"]):
+        section.setdefault("cache", {})["enabled"] = False
+    config["ingestion"]["rss_item_limit"] = max(1, feeds.rss_items)
+    for provider in ("gemini", "tavily"):
+        config["rate_limits"][provider].update(requests_per_minute=args.rpm, burst=max(1, int(args.rpm / 60)),
+                                               base_delay=args.retry_delay, max_delay=args.retry_delay * 8)
+    return config
+
+def run_once(size: int, args) -> dict:
+    """One pipeline run over `size` synthetic trends; must run in a fresh interpreter."""
+    import yaml
+    import tracemalloc
+    import time
+    import fakes
+
+    seed = args.seed
+    feeds = fakes.FeedBackend(size, feeds=args.feeds, duplicate_rate=args.duplicate_rate,
+                              latency=args.feed_latency, failure_rate=args.feed_failure_rate, seed=seed)
+    search = fakes.SearchBackend(latency=args.search_latency, failure_rate=args.search_failure_rate, seed=seed + 1)
+    gemini = fakes.GeminiBackend(fail_verification_rate=args.fail_verification_rate, latency=args.llm_latency,
+                                 failure_rate=args.llm_failure_rate, seed=seed + 2)
+
+    workdir = tempfile.mkdtemp(prefix="newspipeline-bench-")
+    config_file = os.path.join(workdir, "config.yaml")
+    with open(config_file, "w") as f:
+        yaml.safe_dump(bench_config(feeds, args.region, args), f)
+    # Must be set before the pipeline is imported: data paths resolve against the config's directory
+    os.environ["NEWSPIPELINE_CONFIG"] = config_file
+
+    sys.path.insert(0, ROOT)
+    fakes.install(gemini, search, feeds)
+    from src.core.runner import run_pipeline
+
+    if not args.no_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+        _, state = run_pipeline(args.region)
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+
+    nodes = state["metrics"]["nodes"]
+    return {
+        "trends": size,
+        "unique": len(state.get("raw_trends", [])),
+        "articles": len(state.get("articles", [])),
+        "wall_seconds": wall,
+        "peak_mb": peak / 2 ** 20 if peak is not None else None,
+        "stages": {name: counters["seconds"] for name, counters in nodes.items()},
+        "totals": state["metrics"]["totals"],
+        "backends": {b.name: b.stats() for b in (gemini, search, feeds)},
+        "prompts": gemini.prompts
+    }
+
+def measure(size: int, argv: list) -> dict:
+    result = subprocess.run([sys.executable, "-W", "ignore", os.path.abspath(__file__), *argv, "--worker", str(size)],
+                            cwd=os.path.expanduser("~"), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"benchmark run with {size} trends failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def median_run(runs: list) -> dict:
+    """The run with the median wall time, so every column comes from one consistent run."""
+    return sorted(runs, key=lambda r: r["wall_seconds"])[len(runs) // 2]
+
+def report(results: list) -> None:
+    print(f"{'trends':>7} {'unique':>7} {'wall':>8} {'peak MB':>8}  " + " ".join(f"{s:>9}" for s in STAGES))
+    for r in results:
+        peak = f"{r['peak_mb']:8.1f}" if r["peak_mb"] is not None else f"{'-':>8}"
+        stages = " ".join(f"{r['stages'].get(s, 0):8.3f}s" for s in STAGES)
+        print(f"{r['trends']:>7} {r['unique']:>7} {r['wall_seconds']:7.2f}s {peak}  {stages}")
+
+    print(f"\n{'trends':>7} {'articles':>8} {'llm':>6} {'search':>7} {'feeds':>6} {'failed':>7} {'retries':>8} "
+          f"{'prompt tok':>11} {'select prompt':>14}")
+    for r in results:
+        backends, totals = r["backends"], r["totals"]
+        failed = sum(b["failures"] for b in backends.values())
+        select_chars = r["prompts"].get("selection", {}).get("max_prompt_chars", 0)
+        print(f"{r['trends']:>7} {r['articles']:>8} {backends['gemini']['calls']:>6} {backends['search']['calls']:>7} "
+              f"{backends['feeds']['calls']:>6} {failed:>7} {totals['retries']:>8} {totals['prompt_tokens']:>11} "
+              f"{select_chars:>12}ch")
+
+def compare(results: list, baseline_path: str) -> None:
+    with open(baseline_path, "r") as f:
+        baseline = {r["trends"]: r for r in json.load(f)}
+    print(f"\nChange vs {baseline_path}:")
+    for r in results:
+        before = baseline.get(r["trends"])
+        if before is None:
+            continue
+        changes = []
+        for label, now, then in (("wall", r["wall_seconds"], before["wall_seconds"]),
+                                 ("peak", r["peak_mb"], before["peak_mb"]),
+                                 ("select prompt", r["prompts"].get("selection", {}).get("max_prompt_chars"),
+                                  before["prompts"].get("selection", {}).get("max_prompt_chars"))):
+            if now is not None and then:
+                changes.append(f"{label} {100 * (now - then) / then:+.1f}%")
+        print(f"{r['trends']:>7}  " + ", ".join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES, help="Numbers of ingested trends to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the median run is reported")
+    parser.add_argument("--region", default="Global")
+    parser.add_argument("--feeds", type=int, default=3, help="RSS feeds the trends are spread over (plus NewsAPI)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.2, help="Share of headlines re-run by another publisher")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Mean seconds per Gemini call")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Mean seconds per Tavily call")
+    parser.add_argument("--feed-latency", type=float, default=0.0, help="Mean seconds per feed request")
+    parser.add_argument("--failure-rate", type=float, default=None, help="Failure rate for every provider")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--feed-failure-rate", type=float, default=0.0)
+    parser.add_argument("--fail-verification-rate", type=float, default=0.0,
+                        help="Share of verifications that fail, sending the story through refine")
+    parser.add_argument("--rpm", type=float, default=60000, help="Scheduler rate limit per provider")
+    parser.add_argument("--retry-delay", type=float, default=0.05, help="Scheduler backoff base in seconds")
+    parser.add_argument("--no-coverage-index", action="store_true", help="Skip the TF-IDF coverage check in dedup")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc, which slows the run down")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output (with --worker)")
+    parser.add_argument("--json", help="Write the raw results to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier --json run to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.failure_rate is not None:
+        args.llm_failure_rate = args.search_failure_rate = args.feed_failure_rate = args.failure_rate
+
+    if args.worker is not None:
+        print(json.dumps(run_once(args.worker, args)))
+        return
+
+    # Everything but the orchestration flags is passed through to the workers
+    argv = list(sys.argv[1:])
+    for flag in ("--sizes", "--repeat", "--json", "--baseline"):
+        while flag in argv:
+            i = argv.index(flag)
+            j = i + 1
+            while j < len(argv) and not argv[j].startswith("--"):
+                j += 1
+            del argv[i:j]
+
+    results = []
+    for size in args.sizes:
+        runs = [measure(size, argv) for _ in range(args.repeat)]
+        results.append(median_run(runs))
+        if args.repeat > 1:
+            walls = [r["wall_seconds"] for r in runs]
+            print(f"{size} trends: wall {statistics.median(walls):.2f}s median, {min(walls):.2f}-{max(walls):.2f}s over {len(runs)} runs")
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,44 @@
-import os
 import time
-from datetime import datetime
+import argparse
 from dotenv import load_dotenv
-import json
 
-from src.core.models import PipelineOutput
-from src.core.graph import graph
+from src.core.runner import run_pipeline, new_run_id, build_output, write_output, OUTPUT_PATH, ResumeError
 
 def main():
-    import sys
-    region = sys.argv[1] if len(sys.argv) > 1 else "Global"
+    parser = argparse.ArgumentParser(description="Autonomous News Agent")
+    parser.add_argument("region", nargs="?", default="Global", help="Region for news ingestion (Global, US, India)")
+    parser.add_argument("--run-id", help="ID for this run's checkpoints (generated if omitted)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume --run-id (or the most recent run) from its last completed node")
+    args = parser.parse_args()
+    region = args.region
 
     start_time = time.time()
     load_dotenv()
 
     print(f" Starting Autonomous News Agent [Advanced Phase] [Region: {region}]...")
 
-    history_path = "data/history.json"
-    history = []
-    if os.path.exists(history_path):
-        try:
-            with open(history_path, "r") as f:
-                history = json.load(f)
-        except: history = []
-
-    initial_state = {
-        "region": region,
-        "raw_trends": [],
-        "selected_trends": [],
-        "research_results": [],
-        "articles": [],
-        "current_step": "start",
-        "errors": [],
-        "revision_count": 0,
-        "history": history,
-        "critiques": [],
-        "evaluation_score": 0.0
-    }
-
+    run_id = args.run_id or (None if args.resume else new_run_id(region))
     try:
-        final_state = graph.invoke(initial_state)
-        print(" Graph execution complete.")
+        run_id, final_state = run_pipeline(region, run_id=run_id, resume=args.resume)
+        print(f" Graph execution complete. [Run: {run_id}]")
+    except ResumeError as e:
+        print(f" Cannot resume: {e}")
+        return
     except Exception as e:
         print(f" Graph execution failed: {e}")
         import traceback
         traceback.print_exc()
+        if run_id:
+            print(f" Resume from the last completed node with: python main.py --resume --run-id {run_id}")
         return
 
     execution_time = time.time() - start_time
 
     eval_score = final_state.get("evaluation_score", 0.0)
 
-    output = PipelineOutput(
-        date=datetime.utcnow().strftime("%Y-%m-%d"),
-        execution_time_seconds=round(execution_time, 2),
-        articles=final_state["articles"],
-        evaluation_score=eval_score
-    )
-
-    output_path = "data/output.json"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(output.model_dump(), f, indent=2)
-
-    new_history = history + [t.title for t in final_state.get("selected_trends", [])]
-    with open(history_path, "w") as f:
-        json.dump(new_history[-100:], f, indent=2)
+    output_path = OUTPUT_PATH
+    write_output(build_output(final_state, execution_time), output_path)
 
     print(f" Pipeline complete! Result saved to {output_path}")
     print(f" Evaluation Score: {eval_score}/10")
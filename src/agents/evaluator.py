@@ -1,15 +1,14 @@
 import os
 import json
 from typing import List, Dict
-import google.generativeai as genai
 from ..core.models import Article
+from ..core.llm import get_llm, configure_gemini
 
 class NewsEvaluator:
     def __init__(self, api_key: str = None):
-        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+            configure_gemini(api_key)
+        self.llm = get_llm("evaluator")
 
     def evaluate_articles(self, articles: List[Article]) -> float:
         """Evaluate articles for Journalistic Integrity and Factuality."""
@@ -39,12 +38,8 @@ class NewsEvaluator:
         """
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-            )
-            data = json.loads(response.text)
-            return float(data.get("average_score", 0.0))
+            # A response without a score is not cached, so the next evaluation asks again
+            return self.llm.generate(prompt, parse=lambda text: float(json.loads(text)["average_score"]))
         except Exception as e:
             print(f"Evaluation failed: {e}")
             return 5.0
@@ -1,25 +1,24 @@
 import os
-import google.generativeai as genai
 from typing import List, Optional
 from ..core.models import Article, ResearchResult
+from ..core.llm import get_llm, configure_gemini
+from ..core.config import get_config
+from ..services.context import ContextPacker
 import json
-import yaml
 
 class NewsGenerator:
     def __init__(self, api_key: str = None):
-        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-
-        with open("config.yaml", "r") as f:
-            self.config = yaml.safe_load(f)
+            configure_gemini(api_key)
+        self.llm = get_llm("generation")
+        self.config = get_config()
+        self.packer = ContextPacker.from_config(self.config)
 
     def generate_article(self, research: ResearchResult, critique: Optional[str] = None) -> Article:
         """Generate or refine an article based on research and optional critique."""
         print(f"   {' Generating' if not critique else ' Refining'}: {research.trend_title}")
 
-        snippets_text = "\n---\n".join(research.content_snippets)
+        snippets_text = research.packed_context or self.packer.pack(research.content_snippets, [research.trend_title])
         sources_list = "\n".join(research.source_urls)
         word_count = self.config["pipeline"]["article_word_count"]
 
@@ -27,7 +26,7 @@ class NewsGenerator:
         You are an elite investigative journalist. Write a {word_count} word news article about "{research.trend_title}".
 
         RESEARCH CONTEXT:
-        {snippets_text[:8000]}
+        {snippets_text}
 
         AVAILABLE SOURCE URLS (ONLY use these):
         {sources_list}
@@ -57,27 +56,28 @@ class NewsGenerator:
         """
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-            )
-            data = json.loads(response.text)
+            return self.llm.generate(prompt, parse=lambda text: self._build_article(text, research))
+        except Exception as e:
+            print(f"Generation failed: {e}")
+            return None
 
-            actual_urls = set(research.source_urls)
-            generated_urls = data.get("sources", [])
-            valid_urls = [url for url in generated_urls if url in actual_urls]
+    @staticmethod
+    def _build_article(text: str, research: ResearchResult) -> Article:
+        """Raises unless the response makes a valid Article, so nothing else is cached."""
+        data = json.loads(text)
 
-            if not valid_urls or any("example.com" in url or "URL" in url for url in generated_urls):
-                valid_urls = research.source_urls[:3]
+        actual_urls = set(research.source_urls)
+        generated_urls = data.get("sources", [])
+        valid_urls = [url for url in generated_urls if url in actual_urls]
 
-            data["sources"] = valid_urls
-            data["trend_score"] = research.trend_score
-            data["hallucination_check"] = "Unsure"
+        if not valid_urls or any("example.com" in url or "URL" in url for url in generated_urls):
+            valid_urls = research.source_urls[:3]
 
-            return Article(**data)
-        except Exception as e:
-            print(f"Generation failed: {e}")
-            return None
+        data["sources"] = valid_urls
+        data["trend_score"] = research.trend_score
+        data["hallucination_check"] = "Unsure"
+
+        return Article(**data)
 
     def generate_all(self, research_list: List[ResearchResult]) -> List[Article]:
         articles = []
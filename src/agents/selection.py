@@ -1,42 +1,97 @@
-import os
 import json
-from typing import List
-import google.generativeai as genai
-import yaml
+from typing import List, Optional, Tuple
+import difflib
 from ..core.models import RawTrend
+from ..core.prescoring import shortlist_trends
+from ..core.deduplication import normalize_title
+from ..core.llm import get_llm, configure_gemini
+from ..core.config import get_config
+from ..core.history import history_from_config
+
+class TrendIndex:
+    """Maps LLM selections back to RawTrends by ID, then normalized title, then fuzzy title match."""
+
+    def __init__(self, trends: List[RawTrend], cutoff: float = 0.6):
+        self.cutoff = cutoff
+        self.by_id = {t.id: t for t in trends}
+        self.by_title = {}
+        for t in trends:
+            self.by_title.setdefault(normalize_title(t.title), t)
+
+    def lookup(self, trend_id: Optional[str] = None, title: Optional[str] = None) -> Optional[RawTrend]:
+        if trend_id and trend_id.strip("[] ") in self.by_id:
+            return self.by_id[trend_id.strip("[] ")]
+        if not title:
+            return None
+        key = normalize_title(title)
+        if key in self.by_title:
+            return self.by_title[key]
+        close = difflib.get_close_matches(key, list(self.by_title), n=1, cutoff=self.cutoff)
+        return self.by_title[close[0]] if close else None
 
 class TrendSelector:
     def __init__(self, api_key: str = None):
-        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+            configure_gemini(api_key)
+        self.llm = get_llm("selection")
+        self.config = get_config()
 
-        with open("config.yaml", "r") as f:
-            self.config = yaml.safe_load(f)
-
-        self.history_path = "data/history.json"
+        history_cfg = self.config.get("history", {})
+        self.history = history_from_config(self.config)
+        self.history_entries = history_cfg.get("prompt_entries", 20)
+        self.history_horizon_days = history_cfg.get("horizon_days")
 
     def _load_history(self) -> List[str]:
-        if os.path.exists(self.history_path):
-            with open(self.history_path, "r") as f:
-                return json.load(f)
-        return []
+        return self.history.recent(limit=self.history_entries, horizon_days=self.history_horizon_days)
+
+    def _drop_covered(self, trends: List[RawTrend]) -> List[RawTrend]:
+        """Exact repeats of recently covered stories (same content words) never reach the LLM."""
+        covered = self.history.covered([t.title for t in trends], horizon_days=self.history_horizon_days)
+        fresh = [t for t in trends if not covered[t.title]]
+        if len(fresh) < len(trends):
+            print(f"    Skipped {len(trends) - len(fresh)} stories already in history")
+        # Rather a repeat than an empty selection
+        return fresh or trends
+
+    @staticmethod
+    def _parse_selection(text: str) -> List[dict]:
+        """Raises unless every selected item carries a numeric weighted score, so nothing else is cached."""
+        selected_data = json.loads(text)
+        if not isinstance(selected_data, list):
+            raise ValueError("selection is not a JSON list")
+        for item in selected_data:
+            item["weighted_score"] = float(item["weighted_score"])
+        return selected_data
 
     def select_top_trends(self, trends: List[RawTrend], history: List[str] = None) -> List[RawTrend]:
         """Use Gemini to deduplicate, rank with scoring matrix, and filter history."""
+        ranking, _ = self.rank_trends(trends, history)
+        return ranking[:self.config["pipeline"]["top_n_trends"]]
+
+    def rank_trends(self, trends: List[RawTrend], history: List[str] = None) -> Tuple[List[RawTrend], List[RawTrend]]:
+        """The LLM's picks (top N plus spares) best first, and the rest of the shortlist as a reserve.
+
+        Only the ranking may fill the top N: the LLM leaves stories out on purpose (repeats of history,
+        duplicates it merged), so the reserve is kept for replacing trends whose research comes back empty.
+        Picks that can't be mapped back to a trend are made up from the shortlist, keeping the ranking as
+        long as the LLM meant it to be.
+        """
         if not trends:
-            return []
+            return [], []
+
+        trends = shortlist_trends(self._drop_covered(trends), self.config)
+        print(f"    Shortlisted {len(trends)} candidates for LLM ranking")
 
         history = history or self._load_history()
-        history_str = "\n".join([f"- {h}" for h in history[-20:]])
-        trend_list_str = "\n".join([f"- {t.title} (Source: {t.source})" for t in trends])
+        history_str = "\n".join([f"- {h}" for h in history[-self.history_entries:]])
+        trend_list_str = "\n".join([f"- [{t.id}] {t.title} (Source: {t.source})" for t in trends])
 
         weights = self.config["scoring_matrix"]
         count = self.config["pipeline"]["top_n_trends"]
+        spares = self.config.get("selection", {}).get("spare_candidates", 3)
 
         prompt = f"""
-        Analyze the following news trends and select the top {count} unique stories.
+        Analyze the following news trends and select the top {count + spares} unique stories.
 
         History (Avoid these recently covered stories):
         {history_str}
@@ -54,11 +109,12 @@ class TrendSelector:
         2. Deduplicate similar stories within the Current Trends.
         3. Rate each unique story on a scale of 0-10 for each criteria in the Scoring Matrix.
         4. Calculate a Weighted Score.
-        5. Return the top {count} stories.
+        5. Return the top {count + spares} stories, best first.
 
-        Format your response strictly as a JSON list of objects:
+        Format your response strictly as a JSON list of objects, copying each story's ID exactly as shown in brackets:
         [
             {{
+                "id": "t0123456789",
                 "title": "Story Title",
                 "weighted_score": 0.0,
                 "justification": "Why this story was chosen based on the matrix"
@@ -67,27 +123,29 @@ class TrendSelector:
         """
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-            )
-            selected_data = json.loads(response.text)
+            selected_data = self.llm.generate(prompt, parse=self._parse_selection)
 
+            index = TrendIndex(trends)
             final_trends = []
+            unmapped = 0
             for item in selected_data:
-                match = next((t for t in trends if t.title.lower() in item["title"].lower() or item["title"].lower() in t.title.lower()), None)
-
-                if match:
-                    match.relevance_score = item["weighted_score"]
-                    final_trends.append(match)
-                else:
-                    final_trends.append(RawTrend(
-                        title=item["title"],
-                        source="Aggregated",
-                        relevance_score=item["weighted_score"]
-                    ))
-
-            return final_trends[:count]
+                match = index.lookup(item.get("id"), item.get("title"))
+                if match is None:
+                    print(f"    Could not map selection back to a trend: {item.get('title')}")
+                    unmapped += 1
+                    continue
+                if any(t.id == match.id for t in final_trends):
+                    continue
+                match.relevance_score = item["weighted_score"]
+                final_trends.append(match)
+
+            # Make up unmappable picks from the local shortlist rather than inventing URL-less trends
+            chosen = {t.id for t in final_trends}
+            reserve = [t for t in trends if t.id not in chosen]
+            final_trends.extend(reserve[:unmapped])
+            reserve = reserve[unmapped:]
+
+            return final_trends, reserve
         except Exception as e:
             print(f"Error in Trend Selection: {e}")
-            return trends[:count]
+            return trends, []
@@ -1,21 +1,77 @@
 import os
 import json
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import List, Dict
-import google.generativeai as genai
 from ..core.models import Article, ResearchResult, ClaimVerification
+from ..core.llm import get_llm, configure_gemini
+from ..core.config import get_config
+from ..services.context import ContextPacker
+
+MEMO_SIZE = 1024
+
+_memo: "OrderedDict[str, dict]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+def verification_key(article: Article, context: str) -> str:
+    """Hash of everything the verdict depends on: the article body and the context it is checked against."""
+    digest = hashlib.sha256(article.article_body.encode("utf-8"))
+    digest.update(b"\x00" + context.encode("utf-8"))
+    return digest.hexdigest()
 
 class VerificationAgent:
     def __init__(self, api_key: str = None):
-        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+            configure_gemini(api_key)
+        self.llm = get_llm("verification")
+        self.packer = ContextPacker.from_config(get_config())
+
+    def _recall(self, key: str, article: Article) -> bool:
+        with _memo_lock:
+            verdict = _memo.get(key)
+            if verdict is None:
+                return False
+            _memo.move_to_end(key)
+        article.hallucination_check = verdict["hallucination_check"]
+        article.claims = [ClaimVerification(**c) for c in verdict["claims"]]
+        article.critique = verdict["critique"]
+        return True
+
+    def _remember(self, key: str, article: Article) -> None:
+        with _memo_lock:
+            _memo[key] = {
+                "hallucination_check": article.hallucination_check,
+                "claims": [c.model_dump() for c in article.claims or []],
+                "critique": article.critique
+            }
+            _memo.move_to_end(key)
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+
+    @staticmethod
+    def _parse_verdict(text: str) -> dict:
+        """Raises unless the response is a complete Pass/Fail verdict, so nothing else is cached."""
+        data = json.loads(text)
+        if data["hallucination_check"] not in ("Pass", "Fail"):
+            raise ValueError(f"unexpected verdict {data['hallucination_check']!r}")
+        return {
+            "hallucination_check": data["hallucination_check"],
+            "claims": [ClaimVerification(**c) for c in data.get("claims", [])],
+            "critique": data.get("critique", "")
+        }
 
     def verify_article(self, article: Article, research: ResearchResult) -> Article:
         """Decompose article into claims and verify against source snippets."""
-        print(f"    Verifying: {article.title}")
+        # The same packed context the article was generated from, so verify sees exactly what generate saw
+        snippets_text = research.packed_context or self.packer.pack(
+            research.content_snippets, [research.trend_title, article.title, article.summary])
+        key = verification_key(article, snippets_text)
+        if self._recall(key, article):
+            print(f"    Unchanged since last check ({article.hallucination_check}): {article.title}")
+            return article
 
-        snippets_text = "\n---\n".join(research.content_snippets)
+        print(f"    Verifying: {article.title}")
 
         prompt = f"""
         You are a fact-checking editor. Verify the following article against the provided source snippets.
@@ -48,25 +104,14 @@ class VerificationAgent:
         """
 
         try:
-            import time
-            for attempt in range(3):
-                try:
-                    response = self.model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-                    )
-                    data = json.loads(response.text)
-
-                    article.hallucination_check = data["hallucination_check"]
-                    article.claims = [ClaimVerification(**c) for c in data.get("claims", [])]
-                    article.critique = data.get("critique", "")
-                    return article
-                except Exception as e:
-                    if "500" in str(e) and attempt < 2:
-                        print(f"      Got 500 error, retrying ({attempt+1}/3)...")
-                        time.sleep(2)
-                        continue
-                    raise e
+            verdict = self.llm.generate(prompt, parse=self._parse_verdict)
+
+            article.hallucination_check = verdict["hallucination_check"]
+            article.claims = verdict["claims"]
+            article.critique = verdict["critique"]
+            # Only real verdicts are memoized; "Unsure" from a system error should be retried
+            self._remember(key, article)
+            return article
         except Exception as e:
             print(f"    Verification failed for '{article.title}': {e}")
             article.hallucination_check = "Unsure"
@@ -1,14 +1,17 @@
-import os
 import time
+import json
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, Query, HTTPException
-from pydantic import BaseModel, Field
-import json
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from ..core.graph import graph
-from ..core.models import PipelineOutput, Article
+from ..core.jobs import Job, JobManager, JobStatus
+from ..core.runner import NoRunToResume, ResumeError
+from ..core.config import get_config
+from ..core.metrics import render_prometheus
 
 load_dotenv()
 
@@ -18,6 +21,13 @@ app = FastAPI(
     version="2.0.0"
 )
 
+api_cfg = get_config().get("api", {})
+jobs = JobManager(
+    max_workers=api_cfg.get("max_concurrent_runs", 2),
+    max_jobs=api_cfg.get("max_jobs", 100),
+    result_ttl_seconds=api_cfg.get("result_ttl_seconds", 600)
+)
+
 class ArticleOutput(BaseModel):
     title: str
     category: str
@@ -28,63 +38,28 @@ class ArticleOutput(BaseModel):
     hallucination_check: str
 
 class NewsPipelineResponse(BaseModel):
+    run_id: Optional[str] = None
     date: str
     execution_time_seconds: float
     articles: List[ArticleOutput]
+    metrics: Optional[Dict[str, Any]] = None
 
 @app.get("/", tags=["Health"])
 def root():
     return {"status": "online", "message": "News Agent REST API is running."}
 
-@app.post("/run", response_model=NewsPipelineResponse, tags=["Pipeline"])
-async def run_pipeline(region: str = Query("Global", description="Region for news ingestion (Global, US, India)")):
-    """
-    Execute the full news pipeline and return strict JSON output.
-    """
-    start_time = time.time()
-
-    history_path = "data/history.json"
-    history = []
-    if os.path.exists(history_path):
-        try:
-            with open(history_path, "r") as f:
-                history = json.load(f)
-        except:
-            history = []
-
-    initial_state = {
-        "region": region,
-        "raw_trends": [],
-        "selected_trends": [],
-        "research_results": [],
-        "articles": [],
-        "current_step": "start",
-        "errors": [],
-        "revision_count": 0,
-        "history": history,
-        "critiques": [],
-        "evaluation_score": 0.0
-    }
-
-    try:
-        final_state = await graph.ainvoke(initial_state)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {str(e)}")
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+def metrics():
+    """Process-wide node latency, LLM token, search and cache counters in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
-    execution_time = time.time() - start_time
-
-    if final_state.get("selected_trends"):
-        new_trends = [t.title for t in final_state["selected_trends"]]
-        updated_history = (history + new_trends)[-100:]
-        try:
-            os.makedirs("data", exist_ok=True)
-            with open(history_path, "w") as f:
-                json.dump(updated_history, f, indent=2)
-        except:
-            pass
+class JobResponse(JobStatus):
+    result: Optional[NewsPipelineResponse] = None
 
+def _pipeline_response(job: Job) -> NewsPipelineResponse:
+    status = job.status
     output_articles = []
-    for art in final_state.get("articles", []):
+    for art in (job.final_state or {}).get("articles", []):
         output_articles.append(ArticleOutput(
             title=art.title,
             category=art.category,
@@ -95,13 +70,91 @@ async def run_pipeline(region: str = Query("Global", description="Region for new
             hallucination_check=art.hallucination_check
         ))
 
-    response_data = NewsPipelineResponse(
+    return NewsPipelineResponse(
+        run_id=status.run_id,
         date=datetime.utcnow().strftime("%Y-%m-%d"),
-        execution_time_seconds=round(execution_time, 2),
-        articles=output_articles
+        execution_time_seconds=round((status.finished_at or time.time()) - (status.started_at or status.created_at), 2),
+        articles=output_articles,
+        metrics=(job.final_state or {}).get("metrics")
     )
 
-    return response_data
+def _job_response(job: Job) -> JobResponse:
+    response = JobResponse(**job.snapshot().model_dump())
+    if job.status.status == "succeeded":
+        response.result = _pipeline_response(job)
+    return response
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+def create_job(
+    region: str = Query("Global", description="Region for news ingestion (Global, US, India)"),
+    run_id: Optional[str] = Query(None, description="Checkpoint ID for this run (generated if omitted)"),
+    resume: bool = Query(False, description="Resume run_id (or the most recent run) from its last completed node"),
+    refresh: bool = Query(False, description="Start a new run even if a recent result for this region is cached")
+):
+    """
+    Start a pipeline run in the background and return its job ID immediately.
+    Identical requests share the region's in-flight or recently finished job.
+    """
+    return _job_response(jobs.submit(region, run_id=run_id, resume=resume, refresh=refresh))
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+def get_job(job_id: str):
+    """
+    Status, per-node progress events and, once finished, the result of a job.
+    """
+    return _job_response(_get_job(job_id))
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events stream of a job's node updates, ending with its final status.
+    """
+    job = _get_job(job_id)
+
+    async def events():
+        sent = 0
+        while True:
+            done = job.done
+            for event in job.events_since(sent):
+                sent += 1
+                yield f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+            if done:
+                final = job.snapshot()
+                yield f"event: end\ndata: {json.dumps({'status': final.status, 'run_id': final.run_id, 'error': final.error})}\n\n"
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/run", response_model=NewsPipelineResponse, tags=["Pipeline"])
+async def run_pipeline(
+    region: str = Query("Global", description="Region for news ingestion (Global, US, India)"),
+    run_id: Optional[str] = Query(None, description="Checkpoint ID for this run (generated if omitted)"),
+    resume: bool = Query(False, description="Resume run_id (or the most recent run) from its last completed node"),
+    refresh: bool = Query(False, description="Start a new run even if a recent result for this region is cached")
+):
+    """
+    Execute the full news pipeline and return strict JSON output.
+    Concurrent requests for a region share one execution; results are reused for api.result_ttl_seconds.
+    """
+    job = jobs.submit(region, run_id=run_id, resume=resume, refresh=refresh)
+    try:
+        # The run happens on the job pool; awaiting its future keeps the event loop free
+        await asyncio.wrap_future(job.future)
+    except NoRunToResume as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ResumeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pipeline execution failed (run_id={job.status.run_id}, resume with resume=true): {str(e)}")
+
+    return _pipeline_response(job)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,124 @@
+import os
+import copy
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+def make_key(*parts: Any) -> str:
+    """Stable cache key for any JSON-serialisable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class DiskCache:
+    """SQLite-backed key/value cache with TTL expiry and size-bounded LRU eviction.
+
+    Values are stored as zlib-compressed JSON. A small in-memory LRU sits in front of the
+    database so repeated hits within a process never touch disk.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600, max_entries: int = 5000,
+                 max_bytes: int = 200 * 1024 * 1024, memory_entries: int = 256):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, value: Any) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if not self._expired(hit[0]):
+                    self._memory.move_to_end(key)
+                    return copy.deepcopy(hit[1])
+                del self._memory[key]
+
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            blob, created_at = row
+            if self._expired(created_at):
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            value = json.loads(zlib.decompress(blob))
+            self._remember(key, created_at, value)
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+            self._remember(key, now, copy.deepcopy(value))
+
+    def _evict(self) -> None:
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        evicted = False
+        while count > self.max_entries or total > self.max_bytes:
+            # Drop the least recently used tenth in one statement rather than row by row
+            batch = max(1, count // 10)
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (batch,))
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            evicted = True
+        if evicted:
+            self._memory.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self._memory.clear()
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+def get_disk_cache(path: str, **kwargs) -> DiskCache:
+    """Process-wide cache per database path."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = DiskCache(path, **kwargs)
+        return _caches[path]
@@ -0,0 +1,34 @@
+import os
+import threading
+from typing import Dict, Optional
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(ROOT_DIR, "config.yaml")
+# Point at another config file without touching the code or the working directory
+CONFIG_ENV = "NEWSPIPELINE_CONFIG"
+
+_configs: Dict[str, dict] = {}
+_configs_lock = threading.Lock()
+
+def config_path() -> str:
+    return os.path.abspath(os.getenv(CONFIG_ENV) or CONFIG_PATH)
+
+def get_config(path: Optional[str] = None) -> dict:
+    """Parsed config, read from disk once per process and shared by every node and agent.
+
+    Resolved from an explicit path ($NEWSPIPELINE_CONFIG, else the repo's config.yaml), never the
+    working directory. Treat the returned dict as read-only.
+    """
+    path = os.path.abspath(path) if path else config_path()
+    with _configs_lock:
+        if path not in _configs:
+            with open(path, "r") as f:
+                _configs[path] = yaml.safe_load(f) or {}
+        return _configs[path]
+
+def resolve_path(path: str) -> str:
+    """Relative data paths from config.yaml live next to the config file, wherever the process was started."""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(config_path()), path)
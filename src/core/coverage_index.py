@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Optional, Tuple
+from .models import RawTrend
+from .history import HistoryStore
+from .deduplication import normalize_title
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock across processes on `path`, held for the duration of the block."""
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class CoverageIndex:
+    """Similarity index of previously covered stories, cached as a memory-mapped CSR matrix.
+
+    The covered stories themselves live in the history store (SQLite), which serialises every
+    writer; the matrix is a cache of their vectors, one row per history row up to `last_id`. A
+    HashingVectorizer needs no fitting, so rows for newer history entries are appended without
+    touching existing ones. Cache files are only read and written under an exclusive file lock, and
+    every write extends what is on disk, so concurrent processes never drop each other's rows. A
+    missing or unreadable cache is simply rebuilt from the store.
+    """
+
+    def __init__(self, path: str, store: HistoryStore, n_features: int = 2 ** 18):
+        self.path = path
+        self.store = store
+        self.n_features = n_features
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False,
+                                            stop_words="english", norm="l2")
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        with _file_lock(self._file("lock")):
+            self._matrix, self._covered_at, self._last_id = self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _empty(self) -> Tuple[sp.csr_matrix, np.ndarray, int]:
+        return sp.csr_matrix((0, self.n_features), dtype=np.float32), np.zeros(0), 0
+
+    def _load(self) -> Tuple[sp.csr_matrix, np.ndarray, int]:
+        """Cached matrix, stamps and last history id on disk. Call with the file lock held."""
+        if not os.path.exists(self._file("meta.json")):
+            return self._empty()
+        try:
+            with open(self._file("meta.json"), "r") as f:
+                meta = json.load(f)
+            if meta.get("n_features") != self.n_features or "last_id" not in meta:
+                print(f"Coverage index {self.path} was built with different settings; rebuilding.")
+                return self._empty()
+            rows, nnz = meta["rows"], meta["nnz"]
+            data = np.load(self._file("data.npy"), mmap_mode="r")[:nnz]
+            indices = np.load(self._file("indices.npy"), mmap_mode="r")[:nnz]
+            indptr = np.load(self._file("indptr.npy"), mmap_mode="r")[:rows + 1]
+            covered_at = np.load(self._file("covered_at.npy"), mmap_mode="r")[:rows]
+            matrix = sp.csr_matrix((data, indices, indptr), shape=(rows, self.n_features), copy=False)
+            return matrix, covered_at, meta["last_id"]
+        except Exception as e:
+            print(f"Rebuilding unreadable coverage index {self.path}: {e}")
+            return self._empty()
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    def _vectorize(self, titles: List[str]) -> sp.csr_matrix:
+        return self.vectorizer.transform([normalize_title(t) for t in titles]).astype(np.float32)
+
+    def sync(self) -> None:
+        """Append rows for stories recorded in the history store since the cache was last extended."""
+        with self._lock:
+            store_last = self.store.last_id()
+            if store_last == self._last_id:
+                return
+            with _file_lock(self._file("lock")):
+                # Another process may have extended the cache already; build on whatever is on disk
+                matrix, covered_at, last_id = self._load()
+                if last_id > store_last:
+                    # The history store was reset; these rows describe stories it no longer has
+                    matrix, covered_at, last_id = self._empty()
+                new = self.store.since(last_id)
+                if new:
+                    matrix = sp.vstack([matrix, self._vectorize([title for _, title, _ in new])], format="csr")
+                    covered_at = np.concatenate([covered_at, [stamp for _, _, stamp in new]])
+                    self._save(matrix, covered_at, new[-1][0])
+                    matrix, covered_at, last_id = self._load()
+            self._matrix, self._covered_at, self._last_id = matrix, covered_at, last_id
+
+    def similarity(self, titles: List[str], horizon_days: Optional[float] = None) -> np.ndarray:
+        """Highest cosine similarity of each title to any story covered within the horizon."""
+        if not titles:
+            return np.zeros(0)
+        self.sync()
+        with self._lock:
+            matrix, covered_at = self._matrix, self._covered_at
+        if horizon_days is not None and matrix.shape[0]:
+            recent = np.flatnonzero(covered_at >= time.time() - horizon_days * 86400)
+            matrix = matrix[recent]
+        if matrix.shape[0] == 0:
+            return np.zeros(len(titles))
+        scores = self._vectorize(titles) @ matrix.T
+        return scores.max(axis=1).toarray().ravel()
+
+    def filter_covered(self, trends: List[RawTrend], threshold: float = 0.6,
+                       horizon_days: Optional[float] = None) -> Tuple[List[RawTrend], List[RawTrend]]:
+        """Split trends into (fresh, already covered) without any LLM call."""
+        scores = self.similarity([t.title for t in trends], horizon_days=horizon_days)
+        fresh = [t for t, s in zip(trends, scores) if s < threshold]
+        covered = [t for t, s in zip(trends, scores) if s >= threshold]
+        return fresh, covered
+
+    def _save(self, matrix: sp.csr_matrix, covered_at: np.ndarray, last_id: int) -> None:
+        arrays = {
+            "data.npy": matrix.data.astype(np.float32),
+            "indices.npy": matrix.indices.astype(np.int32),
+            "indptr.npy": matrix.indptr.astype(np.int64),
+            "covered_at.npy": np.asarray(covered_at, dtype=np.float64)
+        }
+        for name, array in arrays.items():
+            tmp_path = self._file(f"{name}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, self._file(name))
+
+        # Written last: it is what makes the new rows visible
+        meta = {"rows": matrix.shape[0], "nnz": int(matrix.nnz), "n_features": self.n_features, "last_id": last_id}
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._file("meta.json"))
+
+_indexes: Dict[str, CoverageIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_coverage_index(path: str, store: HistoryStore) -> CoverageIndex:
+    """Process-wide index per path, loaded once."""
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = CoverageIndex(path, store)
+        return _indexes[path]
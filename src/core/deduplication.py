@@ -1,43 +1,188 @@
+import re
+import zlib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from .models import RawTrend
-import yaml
 
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+# Common headline filler that would otherwise make unrelated stories look alike
+STOP_WORDS = frozenset("""
+a an the and or but of in on at to for from by with about as is are was were be been this that
+these those it its after over into up out new says say said will would could may than how why what
+""".split())
 
-def deduplicate_trends(trends: List[RawTrend]) -> List[RawTrend]:
-    """Deduplicate trends using TF-IDF + Cosine Similarity."""
-    if not trends:
-        return []
+_PUBLISHER_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{2,60}$")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Universal hashing modulo a prime just above 2**32 keeps a * x + b inside uint64
+_PRIME = np.uint64((1 << 32) + 15)
+
+# similarity(i, others) -> similarity of item i to each item in `others`, on the dedup threshold's scale
+Similarity = Callable[[int, np.ndarray], np.ndarray]
+
+def normalize_title(title: str) -> str:
+    """Lowercase a headline and drop the trailing ' - Publisher' that aggregators append."""
+    title = _PUBLISHER_SUFFIX.sub("", title or "")
+    return " ".join(_TOKEN.findall(title.lower()))
+
+def _shingles(title: str) -> Set[str]:
+    tokens = [t for t in normalize_title(title).split() if t not in STOP_WORDS]
+    return set(tokens) or {normalize_title(title) or title}
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # Keep the earliest trend as root so clusters are led by the highest-priority source
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+def minhash_signatures(titles: List[str], num_perm: int = 64, seed: int = 1) -> np.ndarray:
+    """MinHash signature matrix (len(titles) x num_perm) over word shingles, computed in one vectorised pass."""
+    shingle_sets = [_shingles(t) for t in titles]
+    lengths = np.array([len(s) for s in shingle_sets])
+    hashes = np.fromiter((zlib.crc32(sh.encode()) for s in shingle_sets for sh in s),
+                         dtype=np.uint64, count=int(lengths.sum()))
+
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    permuted = (a[:, None] * hashes[None, :] + b[:, None]) % _PRIME
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.minimum.reduceat(permuted, starts, axis=1).T
+
+def lsh_bands(num_perm: int, threshold: float) -> int:
+    """Number of LSH bands for a Jaccard threshold.
+
+    A pair becomes a candidate around similarity (1/b)^(1/r). Pick the most rows per band whose
+    candidate threshold is still at or below `threshold`: fewer rows (more bands) let pairs that only
+    share a common word into candidacy, and the candidate count then grows quadratically.
+    """
+    divisors = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+    eligible = [b for b in divisors if (1 / b) ** (b / num_perm) <= threshold + 1e-9]
+    return min(eligible) if eligible else num_perm
+
+def _lsh_candidates(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """Unique (i, j) index pairs, i < j, that share at least one band of their signatures."""
+    num_perm = signatures.shape[1]
+    if num_perm % bands:
+        raise ValueError(f"deduplication.bands ({bands}) must divide num_perm ({num_perm})")
+    rows = num_perm // bands
+
+    left, right = [], []
+    for band in range(0, num_perm, rows):
+        keys = np.ascontiguousarray(signatures[:, band:band + rows]).view(np.dtype((np.void, 8 * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        starts = np.concatenate(([0], np.flatnonzero(keys[order][1:] != keys[order][:-1]) + 1, [len(order)]))
+        sizes = np.diff(starts)
+        # Buckets of exactly two are by far the most common, so pair those up in one shot
+        pair_starts = starts[:-1][sizes == 2]
+        left.append(order[pair_starts])
+        right.append(order[pair_starts + 1])
+        for start in np.flatnonzero(sizes > 2):
+            members = order[starts[start]:starts[start + 1]]
+            i, j = np.triu_indices(len(members), k=1)
+            left.append(members[i])
+            right.append(members[j])
+    left, right = np.concatenate(left), np.concatenate(right)
+    if not len(left):
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.sort(np.stack([left, right], axis=1), axis=1), axis=0)
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+def _minhash_pairs(titles: List[str], threshold: float, num_perm: int,
+                   bands: Optional[int]) -> Tuple[List[Tuple[int, int]], Similarity]:
+    signatures = minhash_signatures(titles, num_perm=num_perm)
+    candidates = _lsh_candidates(signatures, bands or lsh_bands(num_perm, threshold))
 
-    method = config.get("deduplication", {}).get("method", "tfidf")
-    threshold = config.get("deduplication", {}).get("threshold", 0.3)
+    # LSH only proposes candidates. With 64 permutations the signature estimate is off by up to ~0.1,
+    # so confirm with the exact Jaccard of the shingle sets, which is cheap for the few candidates left
+    shingle_sets = [_shingles(t) for t in titles]
 
-    if method != "tfidf" or len(trends) < 2:
-        return trends
+    def similarity(i: int, others: np.ndarray) -> np.ndarray:
+        return np.array([_jaccard(shingle_sets[i], shingle_sets[j]) for j in others.tolist()])
+
+    confirmed = [(i, j) for i, j in candidates.tolist() if _jaccard(shingle_sets[i], shingle_sets[j]) >= threshold]
+    return confirmed, similarity
+
+def _tfidf_pairs(titles: List[str], threshold: float) -> Tuple[List[Tuple[int, int]], Similarity]:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    tfidf_matrix = TfidfVectorizer(stop_words='english').fit_transform(titles).tocsr()
+    # Rows are L2-normalised, so the sparse self-product is cosine similarity without a dense n x n matrix
+    sim = (tfidf_matrix @ tfidf_matrix.T).tocoo()
+    mask = (sim.row < sim.col) & (sim.data > threshold)
+
+    def similarity(i: int, others: np.ndarray) -> np.ndarray:
+        return (tfidf_matrix[others] @ tfidf_matrix[i].T).toarray().ravel()
+
+    return list(zip(sim.row[mask].tolist(), sim.col[mask].tolist())), similarity
+
+def _split_chains(members: List[int], similarity: Similarity, threshold: float) -> List[List[int]]:
+    """Break a connected component into clusters whose members each match the cluster's representative.
+
+    Union-find takes the transitive closure of the pairs, so A~B and B~C would otherwise put two
+    unrelated stories A and C in one cluster. Members keep input order, so the earliest leads.
+    """
+    if len(members) < 3:
+        return [members]
+    groups: List[List[int]] = []
+    for i in members:
+        if groups:
+            scores = similarity(i, np.array([g[0] for g in groups]))
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                groups[best].append(i)
+                continue
+        groups.append([i])
+    return groups
+
+def cluster_trends(trends: List[RawTrend], method: str = "minhash", threshold: float = 0.5,
+                   num_perm: int = 64, bands: Optional[int] = None) -> List[List[RawTrend]]:
+    """Group near-duplicate headlines. Clusters keep input order, each led by its earliest trend.
+
+    `bands` defaults to the LSH banding that matches `threshold` (see `lsh_bands`).
+    """
+    if len(trends) < 2 or method not in ("minhash", "tfidf"):
+        return [[t] for t in trends]
 
     titles = [t.title for t in trends]
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(titles)
-    
-    # Compute similarity matrix
-    sim_matrix = cosine_similarity(tfidf_matrix)
-    
-    to_remove = set()
-    unique_trends = []
-    
+    if method == "tfidf":
+        pairs, similarity = _tfidf_pairs(titles, threshold)
+    else:
+        pairs, similarity = _minhash_pairs(titles, threshold, num_perm, bands)
+
+    uf = _UnionFind(len(trends))
+    for i, j in pairs:
+        uf.union(i, j)
+
+    components: Dict[int, List[int]] = {}
     for i in range(len(trends)):
-        if i in to_remove:
-            continue
-            
-        unique_trends.append(trends[i])
-        
-        for j in range(i + 1, len(trends)):
-            if sim_matrix[i, j] > threshold:
-                to_remove.add(j)
-                # print(f"Deduplicated: '{trends[j].title}' (Similar to '{trends[i].title}')")
-                
+        components.setdefault(uf.find(i), []).append(i)
+    groups = [g for members in components.values() for g in _split_chains(members, similarity, threshold)]
+    return [[trends[i] for i in g] for g in sorted(groups, key=lambda g: g[0])]
+
+def deduplicate_trends(trends: List[RawTrend], method: str = "minhash", threshold: Optional[float] = None,
+                       num_perm: int = 64, bands: Optional[int] = None) -> List[RawTrend]:
+    """Collapse each near-duplicate cluster to its representative, recording the cluster size on it."""
+    if not trends:
+        return []
+    if threshold is None:
+        threshold = 0.3 if method == "tfidf" else 0.5
+
+    unique_trends = []
+    for cluster in cluster_trends(trends, method=method, threshold=threshold, num_perm=num_perm, bands=bands):
+        representative = cluster[0]
+        representative.cluster_size = sum(t.cluster_size for t in cluster)
+        unique_trends.append(representative)
     return unique_trends
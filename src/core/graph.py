@@ -1,91 +1,237 @@
 import os
-from typing import List, Dict, Any
-from langgraph.graph import StateGraph, END
-import yaml
-from .models import AgentState, RawTrend, ResearchResult, Article
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+# langgraph.constants is tiny; StateGraph, Send and the checkpointer (~0.5s of imports) load on first use
+from langgraph.constants import END
+from .config import get_config, resolve_path
+from .metrics import instrument_node
+from .models import AgentState, StoryState, StoryResult, RawTrend, ResearchResult, Article, ClaimVerification
+from .deduplication import deduplicate_trends
 from ..services.ingestion import NewsIngestion
+from ..services.feed_cache import get_feed_cache
+from ..services.sources import SourceRegistry
 from ..agents.selection import TrendSelector
 from ..services.research import NewsResearcher
 from ..agents.generation import NewsGenerator
 from ..agents.verification import VerificationAgent
 from ..agents.evaluator import NewsEvaluator
-
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+from ..services.context import ContextPacker
 
 def ingest_node(state: AgentState) -> Dict[str, Any]:
     print(f"---INGESTING NEWS FOR {state['region']}---")
-    ingestor = NewsIngestion()
-
-    region_map = {
-        "US": {"query": "trending US news", "rss": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"},
-        "India": {"query": "trending India news", "rss": "https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en"},
-        "Global": {"query": "global news trends", "rss": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"}
-    }
+    ingest_cfg = get_config().get("ingestion", {})
+    cache_cfg = ingest_cfg.get("cache", {})
+    feed_cache = None
+    if cache_cfg.get("enabled", False):
+        feed_cache = get_feed_cache(resolve_path(cache_cfg.get("path", "data/feed_cache.json")),
+                                    ttl_seconds=cache_cfg.get("ttl_seconds", 0))
+    ingestor = NewsIngestion(
+        timeout=ingest_cfg.get("source_timeout_seconds", 10),
+        max_connections=ingest_cfg.get("max_connections", 20),
+        concurrent=ingest_cfg.get("concurrent", True),
+        cache=feed_cache,
+        streaming=ingest_cfg.get("streaming", True),
+        rss_item_limit=ingest_cfg.get("rss_item_limit", 10)
+    )
 
-    cfg = region_map.get(state["region"], region_map["Global"])
+    sources = SourceRegistry.from_config(get_config()).for_region(state["region"])
 
     try:
-        raw_trends = ingestor.get_all_trends(query=cfg["query"], rss_url=cfg["rss"])
+        raw_trends = ingestor.get_all_trends(sources=sources)
         if not raw_trends:
             return {"errors": ["No trends found."], "current_step": "ingest_fail"}
         return {"raw_trends": raw_trends, "current_step": "ingest", "revision_count": 0}
     except Exception as e:
         return {"errors": [f"Ingestion failed: {e}"], "current_step": "ingest_error"}
 
+def dedup_node(state: AgentState) -> Dict[str, Any]:
+    print("---DEDUPLICATING TRENDS---")
+    dedup_cfg = get_config().get("deduplication", {})
+    unique_trends = deduplicate_trends(
+        state["raw_trends"],
+        method=dedup_cfg.get("method", "minhash"),
+        threshold=dedup_cfg.get("threshold"),
+        num_perm=dedup_cfg.get("num_perm", 64),
+        bands=dedup_cfg.get("bands")
+    )
+    print(f"    {len(state['raw_trends'])} headlines -> {len(unique_trends)} unique stories")
+
+    index_cfg = get_config().get("coverage_index", {})
+    if index_cfg.get("enabled", False) and unique_trends:
+        # Imported here: sklearn and scipy are only worth loading once there is something to check
+        index = _coverage_index(index_cfg)
+        fresh, covered = index.filter_covered(unique_trends, threshold=index_cfg.get("threshold", 0.6),
+                                              horizon_days=index_cfg.get("horizon_days"))
+        if covered:
+            print(f"    Skipping {len(covered)} stories already covered in the last {index_cfg.get('horizon_days')} days")
+        # Never starve selection entirely: if everything was covered, let the LLM pick among them
+        unique_trends = fresh or unique_trends
+
+    return {"raw_trends": unique_trends, "current_step": "dedup"}
+
+def _coverage_index(index_cfg: dict):
+    from .coverage_index import get_coverage_index
+    from .history import history_from_config
+    return get_coverage_index(resolve_path(index_cfg.get("path", "data/coverage_index")),
+                              history_from_config(get_config()))
+
+def record_coverage(trends: List[RawTrend]) -> None:
+    """Bring the coverage index up to date after a run's stories were recorded in the history store."""
+    index_cfg = get_config().get("coverage_index", {})
+    if not index_cfg.get("enabled", False) or not trends:
+        return
+    try:
+        _coverage_index(index_cfg).sync()
+    except Exception as e:
+        print(f"Could not update coverage index: {e}")
+
 def select_node(state: AgentState) -> Dict[str, Any]:
     print("---SELECTING TRENDS---")
     selector = TrendSelector()
-    selected_trends = selector.select_top_trends(state["raw_trends"])
-    return {"selected_trends": selected_trends, "current_step": "select"}
-
-def research_node(state: AgentState) -> Dict[str, Any]:
-    print("---RESEARCHING TRENDS---")
-    researcher = NewsResearcher()
-    research_results = researcher.research_all(state["selected_trends"])
-    return {"research_results": research_results, "current_step": "research"}
-
-def generate_node(state: AgentState) -> Dict[str, Any]:
-    print("---GENERATING ARTICLES---")
-    generator = NewsGenerator()
-    articles = generator.generate_all(state["research_results"])
-    return {"articles": articles, "current_step": "generate"}
-
-def verify_node(state: AgentState) -> Dict[str, Any]:
-    print("---VERIFYING ARTICLES---")
-    verifier = VerificationAgent()
-    verified_articles = []
-    has_fail = False
-    critiques = []
-
-    for art, res in zip(state["articles"], state["research_results"]):
-        verified_art = verifier.verify_article(art, res)
-        verified_articles.append(verified_art)
-        if verified_art.hallucination_check == "Fail":
-            has_fail = True
-            critiques.append(getattr(verified_art, 'critique', "General quality failure."))
-
-    return {
-        "articles": verified_articles,
-        "current_step": "verify",
-        "critiques": critiques,
-        "revision_count": state.get("revision_count", 0) + (1 if has_fail else 0)
-    }
-
-def refine_node(state: AgentState) -> Dict[str, Any]:
-    print(f"---REFINING ARTICLES (Revision #{state['revision_count']})---")
-    generator = NewsGenerator()
-    refined_articles = []
-
-    for i, (art, res) in enumerate(zip(state["articles"], state["research_results"])):
-        if art.hallucination_check == "Fail":
-            critique = state["critiques"][i] if i < len(state["critiques"]) else "Please improve factuality."
-            refined_art = generator.generate_article(res, critique=critique)
-            refined_articles.append(refined_art)
-        else:
-            refined_articles.append(art)
-
-    return {"articles": refined_articles, "current_step": "refine"}
+    ranking, reserve = selector.rank_trends(state["raw_trends"], state.get("history"))
+    top_n = get_config()["pipeline"]["top_n_trends"]
+    return {"selected_trends": ranking[:top_n], "candidate_trends": ranking[top_n:] + reserve, "current_step": "select"}
+
+def research_story(state: StoryState) -> Dict[str, Any]:
+    research = NewsResearcher().research_trend(state["trend"])
+    if not research.content_snippets:
+        print(f" Research insufficient for: {state['trend'].title}")
+        return {"research": research, "status": "research_failed"}
+    return {"research": research}
+
+def generate_story(state: StoryState) -> Dict[str, Any]:
+    article = NewsGenerator().generate_article(state["research"])
+    if article is None:
+        return {"status": "generation_failed"}
+    return {"article": article}
+
+def verify_story(state: StoryState) -> Dict[str, Any]:
+    # Verdicts are memoized by content hash, so a round only costs an LLM call if refine
+    # rewrote the article or the previous check errored
+    article = VerificationAgent().verify_article(state["article"], state["research"])
+    needs_retry = article.hallucination_check != "Pass"
+    return {"article": article, "revision_count": state.get("revision_count", 0) + (1 if needs_retry else 0)}
+
+def refine_story(state: StoryState) -> Dict[str, Any]:
+    article = state["article"]
+    print(f"---REFINING '{article.title}' (Revision #{state['revision_count']})---")
+    # "Unsure" means verification itself failed; the article goes back to verify unchanged
+    if article.hallucination_check != "Fail":
+        return {}
+    # Re-pack the context around the disputed claims so the rewrite and its re-check see the evidence for them
+    research = state["research"]
+    disputed = [c.claim for c in article.claims or [] if not c.is_verified]
+    if disputed:
+        packed = ContextPacker.from_config(get_config()).pack(research.content_snippets, [research.trend_title] + disputed)
+        research = research.model_copy(update={"packed_context": packed})
+    refined = NewsGenerator().generate_article(research, critique=article.critique or "Please improve factuality.")
+    return {"article": refined or article, "research": research}
+
+def route_story_after_research(state: StoryState) -> str:
+    return END if state.get("status") == "research_failed" else "generate"
+
+def route_story_after_generate(state: StoryState) -> str:
+    return END if state.get("status") == "generation_failed" else "verify"
+
+def route_story_after_verify(state: StoryState) -> str:
+    retry_limit = get_config()["pipeline"]["retry_limit"]
+    article = state["article"]
+    if article.hallucination_check == "Pass":
+        return END
+    if state["revision_count"] < retry_limit:
+        print(f" Routing '{article.title}' to Refine/Retry (Attempt {state['revision_count'] + 1}/{retry_limit}) due to: {article.hallucination_check}")
+        return "refine"
+    print(f" Max revisions reached for '{article.title}' ({article.hallucination_check}). Proceeding.")
+    return END
+
+def create_story_graph():
+    """Research -> generate -> verify <-> refine for a single trend, run once per selected trend."""
+    from langgraph.graph import StateGraph
+    story = StateGraph(StoryState)
+
+    story.add_node("research", instrument_node("research", research_story))
+    story.add_node("generate", instrument_node("generate", generate_story))
+    story.add_node("verify", instrument_node("verify", verify_story))
+    story.add_node("refine", instrument_node("refine", refine_story))
+
+    story.set_entry_point("research")
+    story.add_conditional_edges("research", route_story_after_research, {"generate": "generate", END: END})
+    story.add_conditional_edges("generate", route_story_after_generate, {"verify": "verify", END: END})
+    story.add_conditional_edges("verify", route_story_after_verify, {"refine": "refine", END: END})
+    story.add_edge("refine", "verify")
+
+    return story.compile()
+
+_compiled: Dict[str, Any] = {}
+_compile_lock = threading.Lock()
+
+def _compiled_once(name: str, build):
+    with _compile_lock:
+        if name not in _compiled:
+            _compiled[name] = build()
+        return _compiled[name]
+
+def get_story_graph():
+    return _compiled_once("story", create_story_graph)
+
+def story_node(state: StoryState) -> Dict[str, Any]:
+    trend = state["trend"]
+    print(f"---STORY: {trend.title}---")
+    final = get_story_graph().invoke(state)
+    result = StoryResult(
+        trend=trend,
+        research=final.get("research"),
+        article=final.get("article"),
+        revision_count=final.get("revision_count", 0),
+        status=final.get("status") or "done"
+    )
+    return {"stories": {trend.id: result}}
+
+def _pending_stories(state: AgentState):
+    """Send a story branch for every selected trend that has no result yet."""
+    from langgraph.types import Send
+    stories = state.get("stories") or {}
+    return [Send("story", {"trend": trend, "research": None, "article": None, "revision_count": 0, "status": ""})
+            for trend in state.get("selected_trends", []) if trend.id not in stories]
+
+def fan_out_stories(state: AgentState):
+    """One parallel story branch per selected trend; nothing to do goes straight to gather."""
+    return _pending_stories(state) or "gather"
+
+def gather_node(state: AgentState) -> Dict[str, Any]:
+    print("---GATHERING STORIES---")
+    stories = state.get("stories") or {}
+    selected = list(state.get("selected_trends", []))
+    candidates = list(state.get("candidate_trends", []))
+    retries = state.get("research_retries", 0)
+    retry_limit = get_config()["pipeline"].get("research_retry_limit", 2)
+    update: Dict[str, Any] = {}
+
+    # Swap each trend whose research came back empty for the next-best candidate, keeping its slot;
+    # finished stories are kept, and route_after_gather researches only the replacements
+    failed = [i for i, t in enumerate(selected) if t.id in stories and stories[t.id].status == "research_failed"]
+    if failed and candidates and retries < retry_limit:
+        for i in failed:
+            if not candidates:
+                break
+            replacement = candidates.pop(0)
+            print(f" Research insufficient for '{selected[i].title}'. Trying '{replacement.title}' instead.")
+            selected[i] = replacement
+        update.update({"selected_trends": selected, "candidate_trends": candidates, "research_retries": retries + 1})
+    elif failed:
+        print(f" Research insufficient for {len(failed)} trend(s) and no retries left. Proceeding without them.")
+
+    finished = [stories[t.id] for t in selected if t.id in stories and stories[t.id].article is not None]
+    update.update({
+        "research_results": [s.research for s in finished],
+        "articles": [s.article for s in finished],
+        "critiques": [(s.article.critique or "") if s.article.hallucination_check != "Pass" else "" for s in finished],
+        "revision_count": max((s.revision_count for s in finished), default=0),
+        "current_step": "gather"
+    })
+    return update
 
 def evaluate_node(state: AgentState) -> Dict[str, Any]:
     print("---FINAL EVALUATION (LLM-as-a-Judge)---")
@@ -93,67 +239,111 @@ def evaluate_node(state: AgentState) -> Dict[str, Any]:
     score = evaluator.evaluate_articles(state["articles"])
     return {"current_step": "evaluate", "evaluation_score": score}
 
-def route_after_research(state: AgentState) -> str:
-    if not state.get("research_results") or any(len(r.content_snippets) == 0 for r in state["research_results"]):
-        print(" Research insufficient. Routing back to Selection.")
-        return "select"
-    return "generate"
+def route_after_gather(state: AgentState):
+    return _pending_stories(state) or "evaluate"
 
-def route_after_verify(state: AgentState) -> str:
-    retry_limit = config["pipeline"]["retry_limit"]
+def create_checkpointer(path: str = "data/checkpoints.sqlite"):
+    """Durable per-superstep checkpoints in a local SQLite file, one thread per run ID."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Only our own state models may be rebuilt from a checkpoint
+    serde = JsonPlusSerializer(allowed_msgpack_modules=[
+        (model.__module__, model.__name__)
+        for model in (RawTrend, ResearchResult, Article, ClaimVerification, StoryResult)
+    ])
+    # Story branches run on worker threads; SqliteSaver serialises access with its own lock
+    saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False), serde=serde)
+    saver.setup()
+    with saver.cursor() as cur:
+        # Last time each run was started or resumed, for retention
+        cur.execute("CREATE TABLE IF NOT EXISTS run_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)")
+    return saver
 
-    needs_refine = any(a.hallucination_check in ["Fail", "Unsure"] for a in state["articles"])
+def touch_run(checkpointer, run_id: str) -> None:
+    """Mark a run as active now, so retention keeps it."""
+    with checkpointer.cursor() as cur:
+        cur.execute("INSERT OR REPLACE INTO run_activity (thread_id, updated_at) VALUES (?, ?)", (run_id, time.time()))
 
-    if needs_refine and state["revision_count"] < retry_limit:
-        print(f" Routing to Refine/Retry (Attempt {state['revision_count'] + 1}/{retry_limit}) due to: " +
-              ", ".join([a.hallucination_check for a in state["articles"] if a.hallucination_check != "Pass"]))
-        return "refine"
+def latest_run(checkpointer) -> Optional[str]:
+    """Most recently started run that has checkpoints, whatever namespace they were last written in."""
+    with checkpointer.cursor() as cur:
+        row = cur.execute("SELECT thread_id FROM run_activity WHERE thread_id IN (SELECT thread_id FROM checkpoints) "
+                          "ORDER BY updated_at DESC LIMIT 1").fetchone()
+        if row is None:
+            # Checkpoints written before runs were tracked; checkpoint IDs are time-ordered
+            row = cur.execute("SELECT thread_id FROM checkpoints WHERE checkpoint_ns = '' "
+                              "ORDER BY checkpoint_id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+def prune_checkpoints(checkpointer, keep_runs: Optional[int] = None, max_age_days: Optional[float] = None,
+                      keep: Optional[List[str]] = None) -> List[str]:
+    """Delete every checkpoint of runs beyond the `keep_runs` most recent or idle for over `max_age_days`.
 
-    if needs_refine:
-        print(" Max revisions reached or some articles remained 'Unsure/Fail'. Proceeding to final evaluation.")
-    else:
-        print(" All articles passed verification.")
-    return "evaluate"
+    Runs in `keep` are never deleted. Freed pages are reused by later checkpoints, so the file stops
+    growing once retention kicks in. Returns the deleted run IDs.
+    """
+    if keep_runs is None and max_age_days is None:
+        return []
+    now = time.time()
+    with checkpointer.cursor() as cur:
+        # Runs checkpointed before retention existed start their clock now
+        cur.execute("INSERT OR IGNORE INTO run_activity (thread_id, updated_at) "
+                    "SELECT DISTINCT thread_id, ? FROM checkpoints", (now,))
+        runs = [row[0] for row in cur.execute("SELECT thread_id, updated_at FROM run_activity "
+                                               "ORDER BY updated_at DESC, thread_id").fetchall()
+                if max_age_days is None or now - row[1] <= max_age_days * 86400]
+        active = {row[0] for row in cur.execute("SELECT thread_id FROM run_activity").fetchall()}
+    retained = set(runs[:keep_runs] if keep_runs is not None else runs) | set(keep or [])
+    expired = sorted(active - retained)
+    for run_id in expired:
+        checkpointer.delete_thread(run_id)
+        with checkpointer.cursor() as cur:
+            cur.execute("DELETE FROM run_activity WHERE thread_id = ?", (run_id,))
+    return expired
 
-def create_graph():
+def _default_checkpointer():
+    checkpoint_cfg = get_config().get("checkpoints", {})
+    if not checkpoint_cfg.get("enabled", False):
+        return None
+    return create_checkpointer(resolve_path(checkpoint_cfg.get("path", "data/checkpoints.sqlite")))
+
+def create_graph(checkpointer=None):
+    from langgraph.graph import StateGraph
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("ingest", ingest_node)
-    workflow.add_node("select", select_node)
-    workflow.add_node("research", research_node)
-    workflow.add_node("generate", generate_node)
-    workflow.add_node("verify", verify_node)
-    workflow.add_node("refine", refine_node)
-    workflow.add_node("evaluate", evaluate_node)
+    workflow.add_node("ingest", instrument_node("ingest", ingest_node))
+    workflow.add_node("dedup", instrument_node("dedup", dedup_node))
+    workflow.add_node("select", instrument_node("select", select_node))
+    workflow.add_node("story", instrument_node("story", story_node))
+    workflow.add_node("gather", instrument_node("gather", gather_node))
+    workflow.add_node("evaluate", instrument_node("evaluate", evaluate_node))
 
     workflow.set_entry_point("ingest")
 
-    workflow.add_edge("ingest", "select")
-    workflow.add_edge("select", "research")
+    workflow.add_edge("ingest", "dedup")
+    workflow.add_edge("dedup", "select")
 
-    workflow.add_conditional_edges(
-        "research",
-        route_after_research,
-        {
-            "select": "select",
-            "generate": "generate"
-        }
-    )
+    # Each selected trend streams through its own research/generate/verify branch in parallel,
+    # so a slow story only delays itself; the branches join again at gather
+    workflow.add_conditional_edges("select", fan_out_stories, ["story", "gather"])
+    workflow.add_edge("story", "gather")
 
-    workflow.add_edge("generate", "verify")
+    # Replacements for trends whose research failed go straight back out as new story branches
+    workflow.add_conditional_edges("gather", route_after_gather, ["story", "evaluate"])
 
-    workflow.add_conditional_edges(
-        "verify",
-        route_after_verify,
-        {
-            "refine": "refine",
-            "evaluate": "evaluate"
-        }
-    )
-
-    workflow.add_edge("refine", "verify")
     workflow.add_edge("evaluate", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+def get_graph():
+    """The pipeline graph with the configured checkpointer, compiled on first use rather than at import."""
+    return _compiled_once("pipeline", lambda: create_graph(checkpointer=_default_checkpointer()))
 
-graph = create_graph()
+def __getattr__(name: str):
+    # Keeps `from src.core.graph import graph` working without compiling at import time
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
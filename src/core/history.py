@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+from .models import RawTrend
+from .config import resolve_path
+from .deduplication import STOP_WORDS, normalize_title
+
+def fingerprint(title: str) -> str:
+    """Order-insensitive hash of a headline's content words, so reworded repeats of a story match."""
+    words = sorted({w for w in normalize_title(title).split() if w not in STOP_WORDS})
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()[:16]
+
+class HistoryStore:
+    """Append-only record of covered stories in SQLite (WAL mode).
+
+    Each run's stories are appended in a single transaction, so concurrent runs, threads or
+    processes never see a half-written history, and "recently covered" lookups go through indexes
+    instead of loading the whole file. An existing `data/history.json` is imported on first use.
+    """
+
+    def __init__(self, path: str = "data/history.sqlite", legacy_path: Optional[str] = "data/history.json"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS covered (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                trend_id TEXT,
+                title TEXT NOT NULL,
+                normalized_title TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                region TEXT,
+                run_id TEXT,
+                url TEXT,
+                covered_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_covered_at ON covered (covered_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_covered_region ON covered (region, covered_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_covered_fingerprint ON covered (fingerprint, covered_at)")
+        self._conn.commit()
+
+        if legacy_path:
+            self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path: str) -> None:
+        if not os.path.exists(legacy_path):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM covered LIMIT 1").fetchone():
+                return
+            try:
+                with open(legacy_path, "r") as f:
+                    titles = [t for t in json.load(f) if isinstance(t, str)]
+            except Exception as e:
+                print(f"Could not import {legacy_path}: {e}")
+                return
+            # The JSON list has no timestamps; keep its order by spacing entries just before the file's mtime
+            base = os.path.getmtime(legacy_path) - len(titles)
+            self._conn.executemany(
+                "INSERT INTO covered (title, normalized_title, fingerprint, covered_at) VALUES (?, ?, ?, ?)",
+                [(t, normalize_title(t), fingerprint(t), base + i) for i, t in enumerate(titles)]
+            )
+            self._conn.commit()
+            print(f"Imported {len(titles)} stories from {legacy_path} into {self.path}")
+
+    def record(self, trends: List[RawTrend], region: Optional[str] = None, run_id: Optional[str] = None,
+               covered_at: Optional[float] = None) -> None:
+        """Append a run's covered stories atomically."""
+        if not trends:
+            return
+        now = covered_at or time.time()
+        rows = [(t.id, t.title, normalize_title(t.title), fingerprint(t.title), region, run_id, t.url, now)
+                for t in trends]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO covered (trend_id, title, normalized_title, fingerprint, region, run_id, url, covered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def recent(self, limit: int = 20, region: Optional[str] = None, horizon_days: Optional[float] = None) -> List[str]:
+        """Titles of the most recently covered stories, oldest first like the old history list."""
+        query, params = "SELECT title FROM covered WHERE covered_at >= ?", [0.0]
+        if horizon_days is not None:
+            params[0] = time.time() - horizon_days * 86400
+        if region is not None:
+            query += " AND region = ?"
+            params.append(region)
+        query += " ORDER BY covered_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [title for (title,) in reversed(rows)]
+
+    def covered(self, titles: List[str], horizon_days: Optional[float] = None) -> Dict[str, bool]:
+        """Whether each title's fingerprint was covered within the horizon."""
+        prints = {t: fingerprint(t) for t in titles}
+        since = time.time() - horizon_days * 86400 if horizon_days is not None else 0.0
+        unique = list(set(prints.values()))
+        found = set()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT fingerprint FROM covered WHERE covered_at >= ? AND fingerprint IN ({','.join('?' * len(chunk))})",
+                    [since, *chunk]).fetchall()
+                found.update(fp for (fp,) in rows)
+        return {t: fp in found for t, fp in prints.items()}
+
+    def last_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM covered").fetchone()[0]
+
+    def since(self, last_id: int = 0) -> List[Tuple[int, str, float]]:
+        """Rows appended after `last_id`, oldest first, as (id, title, covered_at)."""
+        with self._lock:
+            return self._conn.execute("SELECT id, title, covered_at FROM covered WHERE id > ? ORDER BY id",
+                                      (last_id,)).fetchall()
+
+_stores: Dict[str, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+def get_history_store(path: str = "data/history.sqlite", legacy_path: Optional[str] = "data/history.json") -> HistoryStore:
+    """Process-wide store per database path."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = HistoryStore(path, legacy_path=legacy_path)
+        return _stores[path]
+
+def history_from_config(config: dict) -> HistoryStore:
+    history_cfg = config.get("history", {})
+    return get_history_store(resolve_path(history_cfg.get("path", "data/history.sqlite")),
+                             legacy_path=resolve_path(history_cfg.get("legacy_path", "data/history.json")))
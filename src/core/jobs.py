@@ -0,0 +1,130 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+from .runner import run_pipeline, new_run_id
+
+class JobStatus(BaseModel):
+    job_id: str
+    run_id: Optional[str] = None
+    region: str
+    status: Literal["queued", "running", "succeeded", "failed"] = "queued"
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    current_node: Optional[str] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = Field(default_factory=list)
+
+class Job:
+    """One pipeline run in the background: its status, progress events and, once done, the final state."""
+
+    def __init__(self, region: str, run_id: Optional[str], resume: bool):
+        self.status = JobStatus(job_id=uuid.uuid4().hex[:12], run_id=run_id, region=region)
+        self.resume = resume
+        self.final_state: Optional[Dict[str, Any]] = None
+        self.future: Future = Future()
+        self._lock = threading.Lock()
+
+    @property
+    def id(self) -> str:
+        return self.status.job_id
+
+    @property
+    def done(self) -> bool:
+        return self.status.status in ("succeeded", "failed")
+
+    def record(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self.status.events.append(event)
+            self.status.current_node = event["node"]
+
+    def events_since(self, index: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.status.events[index:])
+
+    def snapshot(self) -> JobStatus:
+        with self._lock:
+            return self.status.model_copy(deep=True)
+
+    def run(self) -> None:
+        self.status.status = "running"
+        self.status.started_at = time.time()
+        try:
+            run_id, final_state = run_pipeline(self.status.region, run_id=self.status.run_id,
+                                               resume=self.resume, on_progress=self.record)
+        except Exception as e:
+            print(f" Job {self.id} failed: {e}")
+            self.status.error = str(e)
+            self.status.status = "failed"
+            self.status.finished_at = time.time()
+            self.future.set_exception(e)
+            return
+        self.final_state = final_state
+        self.status.run_id = run_id
+        self.status.status = "succeeded"
+        self.status.finished_at = time.time()
+        self.future.set_result(final_state)
+
+class JobManager:
+    """Runs pipelines on a small worker pool so callers get a job ID back immediately.
+
+    Finished jobs are kept, oldest evicted first, up to `max_jobs` so clients can still fetch
+    their results after the run completes.
+
+    Plain runs are single-flight per region: a request while that region's pipeline is in flight
+    joins it, and one within `result_ttl_seconds` of it succeeding gets its result. Runs with an
+    explicit run ID or resume, and `refresh=True`, always start a job of their own.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 100, result_ttl_seconds: float = 0):
+        self.max_jobs = max_jobs
+        self.result_ttl_seconds = result_ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._latest: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _reusable(self, region: str) -> Optional[Job]:
+        job = self._latest.get(region)
+        if job is None or job.status.status == "failed":
+            return None
+        if not job.done:
+            return job
+        return job if time.time() - job.status.finished_at < self.result_ttl_seconds else None
+
+    def submit(self, region: str = "Global", run_id: Optional[str] = None, resume: bool = False,
+               refresh: bool = False) -> Job:
+        shareable = not run_id and not resume
+        with self._lock:
+            if shareable and not refresh:
+                existing = self._reusable(region)
+                if existing is not None:
+                    return existing
+            # A fresh run gets its ID up front so a failed job can be resumed by it
+            job = Job(region, run_id or (None if resume else new_run_id(region)), resume)
+            self._jobs[job.id] = job
+            if shareable:
+                self._latest[region] = job
+            self._prune()
+        self._pool.submit(job.run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+from .config import get_config, resolve_path
+from .scheduler import get_scheduler
+from .cache import DiskCache, get_disk_cache, make_key
+from .metrics import record, timed
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+_clients: Dict[str, "LLMClient"] = {}
+_clients_lock = threading.Lock()
+_configured_key: Optional[str] = None
+
+# Set to 1 to skip the response cache for one run without editing config.yaml
+NO_CACHE_ENV = "NEWSPIPELINE_NO_LLM_CACHE"
+
+def _genai():
+    # google.generativeai takes ~0.6s to import; only pay for it once a model is actually needed
+    import google.generativeai as genai
+    return genai
+
+def configure_gemini(api_key: Optional[str] = None) -> None:
+    """Call genai.configure once per API key instead of once per agent instance."""
+    global _configured_key
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    with _clients_lock:
+        if api_key and api_key != _configured_key:
+            _genai().configure(api_key=api_key)
+            _configured_key = api_key
+
+class LLMClient:
+    """A configured Gemini model for one agent. Every call goes through the shared Gemini scheduler.
+
+    With a cache, responses are stored under an exact-match key of model, prompt and generation
+    config, so identical calls (reruns, resumes after a crash) are answered from disk. Only responses
+    the caller could use are stored: see `generate`.
+    """
+
+    def __init__(self, agent: str, model_name: str = DEFAULT_MODEL, generation_config: Optional[dict] = None,
+                 cache: Optional[DiskCache] = None):
+        self.agent = agent
+        self.model_name = model_name
+        self.generation_config = dict(generation_config or {})
+        self._model = None
+        self.cache = cache
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _genai().GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt: str, json_mode: bool = True, use_cache: bool = True,
+                 parse: Optional[Callable[[str], Any]] = None) -> Any:
+        """Response text, or `parse(text)` if given.
+
+        A response is cached only once it has been accepted: non-empty text, valid JSON in json_mode,
+        and `parse` returned without raising. Anything else would be replayed to every retry and rerun
+        for the cache TTL. Errors from `parse` propagate to the caller.
+        """
+        settings = dict(self.generation_config)
+        if json_mode:
+            settings["response_mime_type"] = "application/json"
+
+        cache = self.cache if use_cache and not os.getenv(NO_CACHE_ENV) else None
+        key = make_key("gemini", self.model_name, prompt, settings)
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                try:
+                    # Entries written before a caller tightened its parsing may no longer be usable
+                    result = parse(cached) if parse else cached
+                    record("cache_hits", cache="llm")
+                    return result
+                except Exception:
+                    pass
+            record("cache_misses", cache="llm")
+
+        with timed("llm_seconds", agent=self.agent, model=self.model_name):
+            response = get_scheduler("gemini").call(
+                self.model.generate_content,
+                prompt,
+                generation_config=_genai().types.GenerationConfig(**settings)
+            )
+        record("llm_calls", agent=self.agent, model=self.model_name)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record("prompt_tokens", getattr(usage, "prompt_token_count", 0) or 0, agent=self.agent, model=self.model_name)
+            record("response_tokens", getattr(usage, "candidates_token_count", 0) or 0, agent=self.agent, model=self.model_name)
+        text = response.text
+
+        result = parse(text) if parse else text
+        if cache and self._cacheable(text, json_mode):
+            cache.set(key, text)
+        return result
+
+    @staticmethod
+    def _cacheable(text: str, json_mode: bool) -> bool:
+        if not json_mode:
+            return bool(text)
+        try:
+            json.loads(text)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+def get_llm(agent: str) -> LLMClient:
+    """Process-wide client per agent, built from the `llm` section of config.yaml on first use."""
+    configure_gemini()
+    with _clients_lock:
+        if agent not in _clients:
+            llm_cfg = get_config().get("llm", {})
+            settings = {**llm_cfg.get("default", {}), **(llm_cfg.get("agents", {}).get(agent) or {})}
+            _clients[agent] = LLMClient(
+                agent,
+                model_name=settings.get("model", DEFAULT_MODEL),
+                generation_config=settings.get("generation_config"),
+                cache=_response_cache(llm_cfg.get("cache", {}))
+            )
+        return _clients[agent]
+
+def _response_cache(cache_cfg: dict) -> Optional[DiskCache]:
+    if not cache_cfg.get("enabled", False):
+        return None
+    return get_disk_cache(
+        resolve_path(cache_cfg.get("path", "data/llm_cache.sqlite")),
+        ttl_seconds=cache_cfg.get("ttl_seconds", 86400),
+        max_entries=cache_cfg.get("max_entries", 10000),
+        max_bytes=int(cache_cfg.get("max_mb", 200) * 1024 * 1024)
+    )
@@ -0,0 +1,129 @@
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Counters kept per node for a run's output JSON; every record() call also feeds the process-wide totals
+NODE_FIELDS = ("calls", "seconds", "llm_calls", "llm_seconds", "prompt_tokens", "response_tokens",
+               "search_calls", "search_seconds", "retries", "cache_hits", "cache_misses", "bytes_downloaded")
+
+METRIC_HELP = {
+    "runs": "Pipeline runs by final status",
+    "run_seconds": "Wall time of pipeline runs",
+    "node_calls": "Graph node executions",
+    "node_seconds": "Wall time spent in graph nodes",
+    "llm_calls": "Gemini calls that reached the API",
+    "llm_seconds": "Wall time of Gemini calls, including scheduler waits and retries",
+    "prompt_tokens": "Prompt tokens reported by Gemini",
+    "response_tokens": "Response tokens reported by Gemini",
+    "search_calls": "Tavily searches that reached the API",
+    "search_seconds": "Wall time of Tavily searches, including scheduler waits and retries",
+    "retries": "Retried provider calls",
+    "cache_hits": "Cache hits by cache",
+    "cache_misses": "Cache misses by cache",
+    "bytes_downloaded": "Response bytes downloaded by source"
+}
+
+class RunMetrics:
+    """Per-node breakdown for one pipeline run. Nested nodes (story branches) count separately."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, node: str, field: str, value: float) -> None:
+        with self._lock:
+            counters = self.nodes.setdefault(node, dict.fromkeys(NODE_FIELDS, 0))
+            counters[field] = counters.get(field, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            nodes = {name: {k: round(v, 3) if isinstance(v, float) else v for k, v in counters.items()}
+                     for name, counters in self.nodes.items()}
+        # Node seconds nest (a story includes its research/generate/verify), so only sum the counters
+        totals = {field: round(sum(n[field] for n in nodes.values()), 3) for field in NODE_FIELDS
+                  if field not in ("calls", "seconds")}
+        totals["wall_seconds"] = round(time.time() - self.started_at, 3)
+        return {"nodes": nodes, "totals": totals}
+
+_run: contextvars.ContextVar[Optional[RunMetrics]] = contextvars.ContextVar("run_metrics", default=None)
+_node: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_node", default="other")
+
+_totals: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_totals_lock = threading.Lock()
+
+def record(metric: str, value: float = 1, **labels: str) -> None:
+    """Count `value` towards a metric for the current node of the current run and the process totals."""
+    key = (metric, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _totals_lock:
+        _totals[key] = _totals.get(key, 0) + value
+    run = _run.get()
+    if run is not None and metric in NODE_FIELDS:
+        run.add(_node.get(), metric, value)
+
+@contextmanager
+def timed(metric: str, **labels: str):
+    """Record the block's wall time under `metric`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(metric, time.perf_counter() - start, **labels)
+
+@contextmanager
+def track_run(run: RunMetrics):
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so its wall time, and every call made inside it, is attributed to `name`."""
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        token = _node.set(name)
+        start = time.perf_counter()
+        try:
+            return fn(state, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record("node_seconds", elapsed, node=name)
+            record("node_calls", node=name)
+            run = _run.get()
+            if run is not None:
+                run.add(name, "seconds", elapsed)
+                run.add(name, "calls", 1)
+            _node.reset(token)
+    return wrapper
+
+def in_context(fn: Callable) -> Callable:
+    """Carry the caller's run and node into a worker thread (thread pools don't copy context vars)."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so each call gets its own copy
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_prometheus() -> str:
+    """All process totals in the Prometheus text exposition format."""
+    with _totals_lock:
+        items = sorted(_totals.items())
+    lines, described = [], set()
+    for (metric, labels), value in items:
+        name = f"newspipeline_{metric}_total"
+        if name not in described:
+            lines.append(f"# HELP {name} {METRIC_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {name} counter")
+            described.add(name)
+        label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+        lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+    return "\n".join(lines) + "\n"
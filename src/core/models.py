@@ -1,19 +1,30 @@
-from typing import List, Literal, Optional, TypedDict, Annotated, Dict
+from typing import Any, List, Literal, Optional, TypedDict, Annotated, Dict
 from pydantic import BaseModel, Field
 import operator
+import hashlib
 
 class RawTrend(BaseModel):
+    id: Optional[str] = None
     title: str
     source: str
     url: Optional[str] = None
     timestamp: Optional[str] = None
     relevance_score: float = 0.0
+    cluster_size: int = 1
+    prescore: float = 0.0
+
+    def model_post_init(self, __context) -> None:
+        # Stable across runs and processes, so the LLM can refer to trends by ID
+        if self.id is None:
+            key = self.url or self.title.strip().lower()
+            self.id = "t" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
 
 class ResearchResult(BaseModel):
     trend_title: str
     content_snippets: List[str]
     source_urls: List[str]
     trend_score: float = 0.0
+    packed_context: Optional[str] = None
 
 class ClaimVerification(BaseModel):
     claim: str
@@ -37,11 +48,33 @@ class PipelineOutput(BaseModel):
     execution_time_seconds: float
     articles: List[Article]
     evaluation_score: Optional[float] = None
+    # Per-node latency, token and call counts for the run; see src/core/metrics.py
+    metrics: Optional[Dict[str, Any]] = None
+
+class StoryResult(BaseModel):
+    trend: RawTrend
+    research: Optional[ResearchResult] = None
+    article: Optional[Article] = None
+    revision_count: int = 0
+    status: Literal["done", "research_failed", "generation_failed"] = "done"
+
+def merge_stories(existing: Optional[Dict[str, StoryResult]], new: Optional[Dict[str, StoryResult]]) -> Dict[str, StoryResult]:
+    """Reducer for parallel story branches: each branch writes its own trend ID, later writes win."""
+    return {**(existing or {}), **(new or {})}
+
+class StoryState(TypedDict):
+    trend: RawTrend
+    research: Optional[ResearchResult]
+    article: Optional[Article]
+    revision_count: int
+    status: str
 
 class AgentState(TypedDict):
+    run_id: Optional[str]
     region: str
     raw_trends: List[RawTrend]
     selected_trends: List[RawTrend]
+    candidate_trends: List[RawTrend]
     research_results: List[ResearchResult]
     articles: List[Article]
     current_step: str
@@ -50,3 +83,5 @@ class AgentState(TypedDict):
     history: List[str]
     critiques: List[str]
     evaluation_score: float
+    research_retries: int
+    stories: Annotated[Dict[str, StoryResult], merge_stories]
@@ -0,0 +1,78 @@
+import math
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from .models import RawTrend
+from .deduplication import normalize_title
+
+DEFAULT_KEYWORDS = {
+    "geopolitical_impact": ["war", "election", "sanctions", "summit", "military", "treaty", "minister",
+                            "president", "ceasefire", "nuclear", "border", "diplomacy", "un", "nato"],
+    "economic_consequences": ["market", "markets", "stocks", "inflation", "tariff", "tariffs", "oil", "bank",
+                              "rates", "economy", "trade", "gdp", "jobs", "prices", "recession"],
+    "human_interest": ["killed", "dead", "rescue", "earthquake", "flood", "storm", "crisis", "children",
+                       "health", "refugees", "protest", "strike", "victims"]
+}
+
+def parse_timestamp(timestamp: Optional[str]) -> Optional[datetime]:
+    """Parse RSS (RFC 822) and NewsAPI (ISO 8601) timestamps into aware datetimes."""
+    if not timestamp:
+        return None
+    for parse in (parsedate_to_datetime, lambda ts: datetime.fromisoformat(ts.replace("Z", "+00:00"))):
+        try:
+            parsed = parse(timestamp)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError, IndexError):
+            continue
+    return None
+
+def _recency(trend: RawTrend, now: datetime, half_life_hours: float) -> float:
+    published = parse_timestamp(trend.timestamp)
+    if published is None:
+        return 0.5
+    age_hours = max(0.0, (now - published).total_seconds() / 3600)
+    return 0.5 ** (age_hours / half_life_hours)
+
+def _keyword_score(title: str, weights: Dict[str, float], keywords: Dict[str, List[str]]) -> float:
+    tokens = set(normalize_title(title).split())
+    total = sum(weights.values()) or 1.0
+    return sum(w * min(1.0, len(tokens & set(keywords.get(category, []))) / 2)
+               for category, w in weights.items()) / total
+
+def prescore_trends(trends: List[RawTrend], config: dict, now: Optional[datetime] = None) -> List[RawTrend]:
+    """Cheap local ranking from recency, cluster size and scoring-matrix keywords; sets `prescore`."""
+    sel_cfg = config.get("selection", {})
+    component_weights = sel_cfg.get("prescore_weights", {"recency": 0.3, "cluster_size": 0.4, "keywords": 0.3})
+    half_life = sel_cfg.get("recency_half_life_hours", 12)
+    keywords = sel_cfg.get("keywords") or DEFAULT_KEYWORDS
+    matrix = config.get("scoring_matrix", {})
+    now = now or datetime.now(timezone.utc)
+
+    largest_cluster = max((t.cluster_size for t in trends), default=1)
+    for trend in trends:
+        cluster = math.log1p(trend.cluster_size) / math.log1p(largest_cluster) if largest_cluster > 1 else 0.0
+        trend.prescore = round(
+            component_weights.get("recency", 0) * _recency(trend, now, half_life)
+            + component_weights.get("cluster_size", 0) * cluster
+            + component_weights.get("keywords", 0) * _keyword_score(trend.title, matrix, keywords), 4)
+    return sorted(trends, key=lambda t: t.prescore, reverse=True)
+
+def shortlist_trends(trends: List[RawTrend], config: dict, now: Optional[datetime] = None) -> List[RawTrend]:
+    """Narrow trends to the configured top-K before the LLM sees them, spreading picks across sources."""
+    sel_cfg = config.get("selection", {})
+    size = sel_cfg.get("shortlist_size", 30)
+    decay = sel_cfg.get("source_diversity_decay", 0.8)
+
+    ranked = prescore_trends(trends, config, now=now)
+    if len(ranked) <= size:
+        return ranked
+
+    # Greedy pick: each further headline from an already-picked source counts for a little less
+    picked, per_source = [], {}
+    remaining = list(ranked)
+    while remaining and len(picked) < size:
+        best = max(remaining, key=lambda t: t.prescore * decay ** per_source.get(t.source, 0))
+        remaining.remove(best)
+        picked.append(best)
+        per_source[best.source] = per_source.get(best.source, 0) + 1
+    return picked
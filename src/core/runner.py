@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from .graph import get_graph, latest_run, prune_checkpoints, record_coverage, touch_run
+from .config import get_config, resolve_path
+from .history import HistoryStore, history_from_config
+from .metrics import RunMetrics, record, track_run
+from .models import RawTrend, Article, PipelineOutput
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+class ResumeError(Exception):
+    """A resume request that can't be honoured with the current configuration."""
+
+class NoRunToResume(ResumeError):
+    """Resume was requested but no checkpointed run exists."""
+
+def new_run_id(region: str) -> str:
+    return f"{region.lower()}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+OUTPUT_PATH = resolve_path("data/output.json")
+
+def build_output(final_state: Dict[str, Any], execution_time: float) -> PipelineOutput:
+    return PipelineOutput(
+        date=datetime.utcnow().strftime("%Y-%m-%d"),
+        execution_time_seconds=round(execution_time, 2),
+        articles=final_state.get("articles", []),
+        evaluation_score=final_state.get("evaluation_score", 0.0),
+        metrics=final_state.get("metrics")
+    )
+
+def write_output(output: PipelineOutput, path: str = OUTPUT_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers such as the dashboard may load the file at any moment; never let them see it half-written
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(output.model_dump(), f, indent=2)
+    os.replace(tmp_path, path)
+
+def history_store() -> HistoryStore:
+    return history_from_config(get_config())
+
+def load_history() -> List[str]:
+    history_cfg = get_config().get("history", {})
+    try:
+        return history_store().recent(limit=history_cfg.get("prompt_entries", 20),
+                                      horizon_days=history_cfg.get("horizon_days"))
+    except Exception as e:
+        print(f"Could not load history: {e}")
+        return []
+
+def save_history(covered: List[RawTrend], region: Optional[str] = None, run_id: Optional[str] = None) -> None:
+    """Append a run's covered stories to the history store and the coverage index."""
+    if not covered:
+        return
+    try:
+        history_store().record(covered, region=region, run_id=run_id)
+    except Exception as e:
+        print(f"Could not update history: {e}")
+    record_coverage(covered)
+
+def covered_trends(state: Dict[str, Any]) -> List[RawTrend]:
+    """Selected trends whose story produced an article; failed stories stay eligible for later runs."""
+    stories = state.get("stories") or {}
+    return [t for t in state.get("selected_trends", []) if t.id in stories and stories[t.id].article is not None]
+
+def initial_state(region: str, history: List[str], run_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "region": region,
+        "raw_trends": [],
+        "selected_trends": [],
+        "research_results": [],
+        "articles": [],
+        "current_step": "start",
+        "errors": [],
+        "revision_count": 0,
+        "history": history,
+        "critiques": [],
+        "evaluation_score": 0.0
+    }
+
+def thread_config(run_id: str) -> Dict[str, Any]:
+    # Story branches run as parallel tasks of one step; this bounds how many are in flight at once
+    max_concurrency = get_config().get("research", {}).get("max_concurrent_trends", 5)
+    return {"configurable": {"thread_id": run_id}, "max_concurrency": max(1, max_concurrency)}
+
+def latest_run_id() -> Optional[str]:
+    """ID of the most recently started checkpointed run, if the graph is checkpointed."""
+    graph = get_graph()
+    if graph.checkpointer is None:
+        return None
+    return latest_run(graph.checkpointer)
+
+def retain_checkpoints(checkpointer, run_id: str) -> None:
+    """Mark `run_id` active and apply the `checkpoints` retention settings to every other run."""
+    checkpoint_cfg = get_config().get("checkpoints", {})
+    try:
+        touch_run(checkpointer, run_id)
+        pruned = prune_checkpoints(checkpointer, keep_runs=checkpoint_cfg.get("keep_runs"),
+                                   max_age_days=checkpoint_cfg.get("max_age_days"), keep=[run_id])
+        if pruned:
+            print(f" Pruned checkpoints of {len(pruned)} old runs")
+    except Exception as e:
+        print(f"Could not prune checkpoints: {e}")
+
+def _summarize(update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """JSON-friendly digest of a node's state update: sizes of collections, verdicts of articles."""
+    summary = {}
+    for key, value in (update or {}).items():
+        if isinstance(value, (list, dict)):
+            summary[key] = len(value)
+        elif isinstance(value, Article):
+            summary[key] = value.hallucination_check
+        elif isinstance(value, BaseModel):
+            summary[key] = type(value).__name__
+        else:
+            summary[key] = value
+    return summary
+
+def _execute(graph_input: Optional[Dict[str, Any]], run_config: Dict[str, Any],
+             on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    graph = get_graph()
+    if on_progress is None:
+        return graph.invoke(graph_input, run_config)
+
+    # Stream node updates, including those inside each story branch, and keep the last full state
+    final_state: Dict[str, Any] = {}
+    story_titles: Dict[str, str] = {}
+    for namespace, mode, chunk in graph.stream(graph_input, run_config, stream_mode=["updates", "values"], subgraphs=True):
+        branch = namespace[0] if namespace else None
+        if mode == "values":
+            if branch is None:
+                final_state = chunk
+            elif "trend" in chunk:
+                story_titles[branch] = chunk["trend"].title
+            continue
+        for node, update in chunk.items():
+            on_progress({"node": node, "story": story_titles.get(branch), "at": time.time(), "update": _summarize(update)})
+    return final_state
+
+def run_pipeline(region: str = "Global", run_id: Optional[str] = None, resume: bool = False,
+                 on_progress: Optional[ProgressCallback] = None) -> Tuple[str, Dict[str, Any]]:
+    """Run the graph under a run ID, or resume that run from its last completed node.
+
+    Resuming a run that already finished returns its final state without doing any work, and
+    history is only recorded by the invocation that actually completes the run. The returned state
+    carries this invocation's per-node metrics under "metrics".
+    """
+    graph = get_graph()
+    if resume and graph.checkpointer is None:
+        raise ResumeError("Resuming requires checkpoints.enabled in config.yaml")
+    if resume and not run_id:
+        run_id = latest_run_id()
+        if run_id is None:
+            raise NoRunToResume("No checkpointed run to resume")
+    run_id = run_id or new_run_id(region)
+    run_config = thread_config(run_id)
+    snapshot = graph.get_state(run_config) if graph.checkpointer is not None else None
+    if resume and (snapshot is None or not snapshot.values):
+        raise NoRunToResume(f"No checkpoint found for run {run_id}")
+    if graph.checkpointer is not None:
+        retain_checkpoints(graph.checkpointer, run_id)
+
+    if resume:
+        if not snapshot.next:
+            print(f" Run {run_id} already completed; returning its result.")
+            return run_id, snapshot.values
+        print(f" Resuming run {run_id} at: {', '.join(snapshot.next)}")
+        graph_input = None
+    else:
+        graph_input = initial_state(region, load_history(), run_id)
+
+    start = time.perf_counter()
+    status = "failed"
+    try:
+        with track_run(RunMetrics()) as run:
+            final_state = _execute(graph_input, run_config, on_progress)
+        status = "succeeded"
+    finally:
+        record("runs", status=status)
+        record("run_seconds", time.perf_counter() - start)
+    final_state = {**final_state, "metrics": run.summary()}
+
+    save_history(covered_trends(final_state), region=final_state.get("region", region), run_id=run_id)
+    return run_id, final_state
@@ -0,0 +1,137 @@
+import re
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from .config import get_config
+from .metrics import record
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRY_IN = re.compile(r"retry in ([0-9.]+)\s*s", re.IGNORECASE)
+
+DEFAULT_LIMITS = {
+    "gemini": {"requests_per_minute": 60, "burst": 5, "max_concurrency": 4},
+    "tavily": {"requests_per_minute": 60, "burst": 5, "max_concurrency": 4}
+}
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        # google.api_core exceptions expose the HTTP status as `.code`
+        status = getattr(error, "code", None)
+    return status if isinstance(status, int) else None
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    # Gemini quota errors carry the hint in the message ("Please retry in 23.5s")
+    match = _RETRY_IN.search(str(error))
+    return float(match.group(1)) if match else None
+
+def classify(error: Exception) -> Tuple[bool, Optional[float]]:
+    """Decide whether an error is worth retrying, and how long the provider asked us to wait."""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS, _retry_after(error)
+    name = type(error).__name__
+    transient = ("Timeout", "ConnectionError", "ConnectError", "ServiceUnavailable", "ResourceExhausted",
+                 "InternalServerError", "DeadlineExceeded", "TooManyRequests", "RemoteProtocolError")
+    return any(t in name for t in transient), _retry_after(error)
+
+class ProviderScheduler:
+    """Token-bucket rate limit, concurrency cap and jittered exponential backoff for one provider.
+
+    The rate adapts: a 429 halves it and pauses every caller until the provider's Retry-After has
+    passed, and each success creeps it back towards the configured ceiling.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 60, burst: int = 5, max_concurrency: int = 4,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.max_rate = requests_per_minute / 60.0
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    def _acquire_token(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def _on_throttled(self, delay: float) -> None:
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                self._acquire_token()
+                try:
+                    result = fn(*args, **kwargs)
+                    self._on_success()
+                    return result
+                except Exception as e:
+                    retryable, retry_after = classify(e)
+                    if not retryable or attempt == self.max_retries:
+                        raise
+                    delay = min(self.max_delay, retry_after) if retry_after is not None else self.backoff(attempt)
+                    if _status_code(e) == 429 or "ResourceExhausted" in type(e).__name__:
+                        self._on_throttled(delay)
+                    record("retries", provider=self.name)
+                    print(f"      {self.name} call failed ({e.__class__.__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            # Sleep outside the concurrency slot so other callers can use it meanwhile
+            time.sleep(delay)
+
+_schedulers: Dict[str, ProviderScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def _load_limits() -> dict:
+    try:
+        return get_config().get("rate_limits", {})
+    except OSError:
+        return {}
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """The process-wide scheduler every call to `provider` must go through."""
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            settings = {**DEFAULT_LIMITS.get(provider, {}), **_load_limits().get(provider, {})}
+            _schedulers[provider] = ProviderScheduler(provider, **settings)
+        return _schedulers[provider]
@@ -0,0 +1,107 @@
+import re
+import math
+from collections import Counter
+from typing import Iterable, List, Optional, Set
+from ..core.deduplication import STOP_WORDS
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count: about four characters per token for English prose."""
+    return (len(text) + 3) // 4
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+class ContextPacker:
+    """Turns raw research snippets into a compact, relevance-ordered prompt context.
+
+    Snippets are split into passages of roughly `passage_chars`, near-duplicate passages (the same
+    wire copy syndicated by several publishers) are dropped, and the rest are ranked with BM25 against
+    the queries (trend title, gap queries, disputed claims) and packed until `token_budget` is reached.
+    """
+
+    def __init__(self, token_budget: int = 2000, passage_chars: int = 600, dedup_threshold: float = 0.8,
+                 k1: float = 1.5, b: float = 0.75):
+        self.token_budget = token_budget
+        self.passage_chars = passage_chars
+        self.dedup_threshold = dedup_threshold
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ContextPacker":
+        ctx_cfg = config.get("context", {})
+        return cls(
+            token_budget=ctx_cfg.get("token_budget", 2000),
+            passage_chars=ctx_cfg.get("passage_chars", 600),
+            dedup_threshold=ctx_cfg.get("dedup_threshold", 0.8)
+        )
+
+    def passages(self, snippets: Iterable[str]) -> List[str]:
+        """Split snippets on paragraphs, then group sentences up to `passage_chars`."""
+        passages = []
+        for snippet in snippets:
+            for paragraph in _BLANK_LINES.split(snippet or ""):
+                current = ""
+                for sentence in _SENTENCE_END.split(" ".join(paragraph.split())):
+                    if current and len(current) + len(sentence) + 1 > self.passage_chars:
+                        passages.append(current)
+                        current = ""
+                    current = f"{current} {sentence}".strip()
+                if current:
+                    passages.append(current)
+        return passages
+
+    def _dedupe(self, passages: List[str]) -> List[str]:
+        kept: List[str] = []
+        kept_sets: List[Set[str]] = []
+        for passage in passages:
+            tokens = set(_tokens(passage))
+            if not tokens:
+                continue
+            if any(len(tokens & other) / len(tokens | other) >= self.dedup_threshold for other in kept_sets):
+                continue
+            kept.append(passage)
+            kept_sets.append(tokens)
+        return kept
+
+    def rank(self, passages: List[str], queries: List[str]) -> List[str]:
+        """Order passages by BM25 score against all queries combined; ties keep their original order."""
+        docs = [Counter(_tokens(p)) for p in passages]
+        query_terms = Counter(t for q in queries for t in _tokens(q))
+        if not docs or not query_terms:
+            return list(passages)
+
+        n = len(docs)
+        avg_len = sum(sum(d.values()) for d in docs) / n or 1.0
+        df = Counter(term for d in docs for term in d)
+
+        def score(doc: Counter) -> float:
+            length = sum(doc.values())
+            total = 0.0
+            for term, weight in query_terms.items():
+                tf = doc.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                total += weight * idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_len))
+            return total
+
+        order = sorted(range(n), key=lambda i: -score(docs[i]))
+        return [passages[i] for i in order]
+
+    def pack(self, snippets: Iterable[str], queries: List[str], token_budget: Optional[int] = None) -> str:
+        """Most relevant unique passages that fit in the token budget, separated like the old snippet joins."""
+        budget = token_budget or self.token_budget
+        packed, used = [], 0
+        for passage in self.rank(self._dedupe(self.passages(snippets)), queries):
+            cost = estimate_tokens(passage) + 1
+            if used + cost > budget:
+                # A long passage may not fit while a shorter, less relevant one still does
+                continue
+            packed.append(passage)
+            used += cost
+        return "\n---\n".join(packed)
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+from ..core.models import RawTrend
+
+class FeedCache:
+    """Persistent HTTP cache for ingestion: ETag/Last-Modified validators plus parsed trends per URL."""
+
+    def __init__(self, path: str = "data/feed_cache.json", ttl_seconds: float = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable feed cache {self.path}: {e}")
+        return {}
+
+    def fresh(self, key: str) -> Optional[List[RawTrend]]:
+        """Return cached trends if they are younger than the TTL, so no request is needed at all."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or self.ttl_seconds <= 0:
+            return None
+        if time.time() - entry["fetched_at"] > self.ttl_seconds:
+            return None
+        return [RawTrend(**t) for t in entry["trends"]]
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, key: str) -> List[RawTrend]:
+        """Handle a 304: the stored parse is still current, refresh its age and return it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return []
+            entry["fetched_at"] = time.time()
+            self._dirty = True
+        return [RawTrend(**t) for t in entry["trends"]]
+
+    def store(self, key: str, trends: List[RawTrend], headers) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "trends": [t.model_dump() for t in trends]
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache atomically so a crash mid-write never leaves a truncated file."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._entries)
+            self._dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.path)
+
+_caches: Dict[str, FeedCache] = {}
+_caches_lock = threading.Lock()
+
+def get_feed_cache(path: str = "data/feed_cache.json", ttl_seconds: float = 0) -> FeedCache:
+    """Process-wide cache per path, so repeated runs in one process skip reloading it from disk."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = FeedCache(path, ttl_seconds)
+        cache.ttl_seconds = ttl_seconds
+        return cache
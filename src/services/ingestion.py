@@ -1,61 +1,338 @@
 import os
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import Future
+import httpx
 import requests
-from typing import List
+from typing import Dict, List, Optional, Iterator, Tuple
 from ..core.models import RawTrend
+from ..core.metrics import record
+from .feed_cache import FeedCache
+from .sources import SourceSpec
 import xml.etree.ElementTree as ET
 
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+DEFAULT_RSS_URL = "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"
+
+def _run_sync(coro):
+    """Run a coroutine to completion, even when called from inside a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+    def runner():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    # Keep the caller's run metrics attached to the fetches made on the helper thread
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(runner,), daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _claim(key: str) -> Tuple[Future, bool]:
+    """Register a fetch for `key`; concurrent callers for the same key get the owner's future instead."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = _inflight[key] = Future()
+        # A running future can't be cancelled by a waiter that hits its own deadline
+        future.set_running_or_notify_cancel()
+        return future, True
+
+def _settle(key: str, future: Future, trends: Optional[List[RawTrend]] = None,
+            error: Optional[BaseException] = None) -> None:
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is None:
+        future.set_result(trends)
+    else:
+        future.set_exception(error if isinstance(error, Exception) else RuntimeError(f"Fetch of {key} was cancelled"))
+
+def _copies(trends: List[RawTrend], limit: int) -> List[RawTrend]:
+    return [t.model_copy() for t in trends[:limit]]
+
+class RssItemStream:
+    """Incremental RSS parser: feed it raw chunks and it returns finished items until the cap is hit."""
+
+    def __init__(self, limit: int = 10, source: str = "RSS Feed"):
+        self.limit = limit
+        self.source = source
+        self.emitted = 0
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    @property
+    def done(self) -> bool:
+        return self.emitted >= self.limit
+
+    def feed(self, chunk: bytes) -> List[RawTrend]:
+        self._parser.feed(chunk)
+        trends = []
+        for _, elem in self._parser.read_events():
+            if elem.tag != "item" or self.done:
+                continue
+            title, link, pub_date = elem.findtext("title"), elem.findtext("link"), elem.find("pubDate")
+            trends.append(RawTrend(
+                title=title,
+                source=elem.findtext("source") or self.source,
+                url=link,
+                timestamp=pub_date.text if pub_date is not None else None
+            ))
+            self.emitted += 1
+            # Drop the parsed subtree so memory stays flat however large the feed is
+            elem.clear()
+        return trends
+
 class NewsIngestion:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, timeout: float = 10, max_connections: int = 20,
+                 concurrent: bool = True, cache: Optional[FeedCache] = None,
+                 streaming: bool = True, rss_item_limit: int = 10, chunk_size: int = 16384):
         self.api_key = api_key or os.getenv("NEWS_API_KEY")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.concurrent = concurrent
+        self.cache = cache
+        self.streaming = streaming
+        self.rss_item_limit = rss_item_limit
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+
+    def _cached(self, key: str) -> Optional[List[RawTrend]]:
+        if not self.cache:
+            return None
+        trends = self.cache.fresh(key)
+        record("cache_hits" if trends is not None else "cache_misses", cache="feed")
+        return trends
+
+    def _request_headers(self, key: str) -> dict:
+        return self.cache.conditional_headers(key) if self.cache else {}
+
+    def _not_modified(self, key: str, status_code: int) -> Optional[List[RawTrend]]:
+        """On a 304 reuse the stored parse instead of downloading and parsing the body again."""
+        if self.cache and status_code == 304:
+            trends = self.cache.revalidated(key)
+            if trends is not None:
+                record("cache_hits", cache="feed_304")
+            return trends
+        return None
+
+    def _remember(self, key: str, trends: List[RawTrend], headers) -> List[RawTrend]:
+        if self.cache:
+            self.cache.store(key, trends, headers)
+        return trends
+
+    def _newsapi_params(self, query: str) -> dict:
+        return {"q": query, "sortBy": "publishedAt", "apiKey": self.api_key}
+
+    def _parse_newsapi(self, data: dict, limit: int = 20) -> List[RawTrend]:
+        trends = []
+        for article in data.get("articles", [])[:limit]:
+            trends.append(RawTrend(
+                title=article["title"],
+                source=article["source"]["name"],
+                url=article["url"],
+                timestamp=article["publishedAt"]
+            ))
+        return trends
+
+    def _parse_rss(self, content: bytes, limit: int, source: str = "RSS Feed") -> List[RawTrend]:
+        root = ET.fromstring(content)
+
+        trends = []
+        for item in root.findall(".//item")[:limit]:
+            pub_date = item.find("pubDate")
+            trends.append(RawTrend(
+                title=item.find("title").text,
+                source=item.findtext("source") or source,
+                url=item.find("link").text,
+                timestamp=pub_date.text if pub_date is not None else None
+            ))
+        return trends
 
-    def fetch_from_newsapi(self, query: str = "global news") -> List[RawTrend]:
+    def fetch_from_newsapi(self, query: str = "global news", max_items: int = 20) -> List[RawTrend]:
         """Fetch trending news from NewsAPI."""
         if not self.api_key:
             return []
 
-        url = f"https://newsapi.org/v2/everything?q={query}&sortBy=publishedAt&apiKey={self.api_key}"
+        key = f"newsapi:{query}"
         try:
-            response = requests.get(url, timeout=10)
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            response = self.session.get(NEWSAPI_URL, params=self._newsapi_params(query),
+                                        headers=self._request_headers(key), timeout=self.timeout)
+            not_modified = self._not_modified(key, response.status_code)
+            if not_modified is not None:
+                return not_modified
             response.raise_for_status()
-            data = response.json()
-
-            trends = []
-            for article in data.get("articles", [])[:20]:
-                trends.append(RawTrend(
-                    title=article["title"],
-                    source=article["source"]["name"],
-                    url=article["url"],
-                    timestamp=article["publishedAt"]
-                ))
-            return trends
+            record("bytes_downloaded", len(response.content), source="newsapi")
+            return self._remember(key, self._parse_newsapi(response.json(), max_items), response.headers)
         except Exception as e:
             print(f"Error fetching from NewsAPI: {e}")
             return []
 
-    def fetch_from_rss(self, feed_url: str) -> List[RawTrend]:
+    def _iter_rss_response(self, response, limit: int, source: str) -> Iterator[RawTrend]:
+        stream = RssItemStream(limit, source)
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            record("bytes_downloaded", len(chunk), source="rss")
+            yield from stream.feed(chunk)
+            if stream.done:
+                return
+
+    def stream_rss(self, feed_url: str, max_items: Optional[int] = None) -> Iterator[RawTrend]:
+        """Lazily yield items from an RSS feed, closing the connection as soon as the item cap is reached."""
+        with self.session.get(feed_url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            yield from self._iter_rss_response(response, max_items or self.rss_item_limit, "RSS Feed")
+
+    def fetch_from_rss(self, feed_url: str, max_items: Optional[int] = None, name: str = "RSS Feed") -> List[RawTrend]:
         """Fetch news from an RSS feed (e.g., BBC, Reuters)."""
+        limit = max_items or self.rss_item_limit
+        try:
+            cached = self._cached(feed_url)
+            if cached is not None:
+                return cached
+            with self.session.get(feed_url, headers=self._request_headers(feed_url),
+                                  timeout=self.timeout, stream=self.streaming) as response:
+                not_modified = self._not_modified(feed_url, response.status_code)
+                if not_modified is not None:
+                    return not_modified
+                response.raise_for_status()
+                if self.streaming:
+                    trends = list(self._iter_rss_response(response, limit, name))
+                else:
+                    record("bytes_downloaded", len(response.content), source="rss")
+                    trends = self._parse_rss(response.content, limit, name)
+                return self._remember(feed_url, trends, response.headers)
+        except Exception as e:
+            print(f"Error fetching from RSS: {e}")
+            return []
+
+    def fetch_source(self, spec: SourceSpec) -> List[RawTrend]:
+        """Fetch one registry source, sharing the result with any concurrent fetch of the same URL."""
+        future, owner = _claim(spec.key)
+        if not owner:
+            return _copies(future.result(), spec.max_items)
         try:
-            response = requests.get(feed_url, timeout=10)
+            if spec.type == "newsapi":
+                trends = self.fetch_from_newsapi(query=spec.query, max_items=spec.max_items)
+            else:
+                trends = self.fetch_from_rss(spec.url, max_items=spec.max_items, name=spec.name or "RSS Feed")
+        except BaseException as e:
+            _settle(spec.key, future, error=e)
+            raise
+        _settle(spec.key, future, trends)
+        return trends
+
+    async def _afetch_from_newsapi(self, client: httpx.AsyncClient, query: str, max_items: int = 20) -> List[RawTrend]:
+        key = f"newsapi:{query}"
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        response = await client.get(NEWSAPI_URL, params=self._newsapi_params(query),
+                                    headers=self._request_headers(key))
+        not_modified = self._not_modified(key, response.status_code)
+        if not_modified is not None:
+            return not_modified
+        response.raise_for_status()
+        record("bytes_downloaded", len(response.content), source="newsapi")
+        return self._remember(key, self._parse_newsapi(response.json(), max_items), response.headers)
+
+    async def _afetch_from_rss(self, client: httpx.AsyncClient, feed_url: str, max_items: Optional[int] = None,
+                               name: str = "RSS Feed") -> List[RawTrend]:
+        limit = max_items or self.rss_item_limit
+        cached = self._cached(feed_url)
+        if cached is not None:
+            return cached
+        async with client.stream("GET", feed_url, headers=self._request_headers(feed_url)) as response:
+            not_modified = self._not_modified(feed_url, response.status_code)
+            if not_modified is not None:
+                return not_modified
             response.raise_for_status()
-            root = ET.fromstring(response.content)
+            if not self.streaming:
+                content = await response.aread()
+                record("bytes_downloaded", len(content), source="rss")
+                return self._remember(feed_url, self._parse_rss(content, limit, name), response.headers)
 
             trends = []
-            for item in root.findall(".//item")[:10]:
-                trends.append(RawTrend(
-                    title=item.find("title").text,
-                    source="RSS Feed",
-                    url=item.find("link").text,
-                    timestamp=item.find("pubDate").text if item.find("pubDate") is not None else None
-                ))
-            return trends
+            stream = RssItemStream(limit, name)
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                record("bytes_downloaded", len(chunk), source="rss")
+                trends.extend(stream.feed(chunk))
+                if stream.done:
+                    # Leaving the block early closes the response instead of draining the rest of the feed
+                    break
+            return self._remember(feed_url, trends, response.headers)
+
+    async def _afetch_source(self, client: httpx.AsyncClient, spec: SourceSpec) -> List[RawTrend]:
+        future, owner = _claim(spec.key)
+        if not owner:
+            return _copies(await asyncio.shield(asyncio.wrap_future(future)), spec.max_items)
+        try:
+            if spec.type == "newsapi":
+                trends = await self._afetch_from_newsapi(client, spec.query, max_items=spec.max_items)
+            else:
+                trends = await self._afetch_from_rss(client, spec.url, max_items=spec.max_items,
+                                                     name=spec.name or "RSS Feed")
+        except BaseException as e:
+            _settle(spec.key, future, error=e)
+            raise
+        _settle(spec.key, future, trends)
+        return trends
+
+    async def _with_deadline(self, label: str, coro) -> List[RawTrend]:
+        """Bound a single source by the per-source deadline so one slow feed can't stall the rest."""
+        try:
+            return await asyncio.wait_for(coro, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Error fetching from {label}: no response within {self.timeout}s")
         except Exception as e:
-            print(f"Error fetching from RSS: {e}")
-            return []
+            print(f"Error fetching from {label}: {e}")
+        return []
+
+    def _usable(self, sources: List[SourceSpec]) -> List[SourceSpec]:
+        return [s for s in sources if s.type == "rss" or self.api_key]
+
+    async def aget_all_trends(self, sources: List[SourceSpec]) -> List[RawTrend]:
+        """Fetch every source concurrently over one shared keep-alive connection pool."""
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True) as client:
+            batches = await asyncio.gather(*[
+                self._with_deadline(spec.name or spec.key, self._afetch_source(client, spec))
+                for spec in self._usable(sources)
+            ])
 
-    def get_all_trends(self, query: str = "global news", rss_url: Optional[str] = None) -> List[RawTrend]:
-        """Aggregate trends from multiple sources with custom query and RSS."""
-        trends = self.fetch_from_newsapi(query=query)
+        return [trend for batch in batches for trend in batch]
+
+    def get_all_trends(self, sources: Optional[List[SourceSpec]] = None, query: str = "global news",
+                       rss_url: Optional[str] = None) -> List[RawTrend]:
+        """Aggregate trends from the given registry sources (or a single query and RSS feed)."""
+        if sources is None:
+            sources = [SourceSpec(type="newsapi", query=query, max_items=20),
+                       SourceSpec(type="rss", url=rss_url or DEFAULT_RSS_URL, max_items=self.rss_item_limit)]
+
+        if self.concurrent:
+            trends = _run_sync(self.aget_all_trends(sources))
+        else:
+            trends = []
+            for spec in self._usable(sources):
+                trends.extend(self.fetch_source(spec))
 
-        rss_url = rss_url or "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"
-        trends.extend(self.fetch_from_rss(rss_url))
+        if self.cache:
+            try:
+                self.cache.save()
+            except Exception as e:
+                print(f"Could not persist feed cache: {e}")
         return trends
@@ -1,56 +1,88 @@
 import os
 import requests
+import re
 import json
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
-import google.generativeai as genai
-import yaml
 from ..core.models import RawTrend, ResearchResult
+from ..core.cache import get_disk_cache, make_key
+from ..core.scheduler import get_scheduler
+from ..core.llm import get_llm, configure_gemini
+from ..core.config import get_config, resolve_path
+from ..core.metrics import record, timed, in_context
+from .context import ContextPacker
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and spacing don't change Tavily's answer, so they shouldn't change the cache key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
 
 class NewsResearcher:
     def __init__(self, api_key: str = None):
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-
-        with open("config.yaml", "r") as f:
-            self.config = yaml.safe_load(f)
+        if api_key:
+            configure_gemini(api_key)
+        self.llm = get_llm("research")
+        self.config = get_config()
 
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
 
+        research_cfg = self.config.get("research", {})
+        self.concurrent = research_cfg.get("concurrent", True)
+        self.tavily = get_scheduler("tavily")
+        self.packer = ContextPacker.from_config(self.config)
+        self.gap_token_budget = self.config.get("context", {}).get("gap_token_budget", 1000)
+
+        cache_cfg = self.config["search"].get("cache", {})
+        self.search_cache = None
+        if cache_cfg.get("enabled", False):
+            self.search_cache = get_disk_cache(
+                resolve_path(cache_cfg.get("path", "data/search_cache.sqlite")),
+                ttl_seconds=cache_cfg.get("ttl_seconds", 3600),
+                max_entries=cache_cfg.get("max_entries", 5000),
+                max_bytes=int(cache_cfg.get("max_mb", 200) * 1024 * 1024)
+            )
+
     def _tavily_search(self, query: str, max_results: int = 5) -> List[Dict]:
         if not self.tavily_api_key:
             print("Warning: TAVILY_API_KEY not found. Falling back to basic scraping.")
             return []
 
         url = "https://api.tavily.com/search"
-        payload = {
-            "api_key": self.tavily_api_key,
-            "query": query,
-            "search_depth": "advanced",
-            "max_results": max_results,
-            "include_raw_content": True
-        }
+        params = {"search_depth": "advanced", "max_results": max_results, "include_raw_content": True}
+        payload = {"api_key": self.tavily_api_key, "query": query, **params}
+
+        cache_key = make_key("tavily", normalize_query(query), params)
+        if self.search_cache:
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                record("cache_hits", cache="search")
+                return cached
+            record("cache_misses", cache="search")
 
         timeout = self.config["search"].get("timeout_seconds", 60)
-        import time
-        max_retries = 3
-
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(url, json=payload, timeout=timeout)
-                response.raise_for_status()
-                return response.json().get("results", [])
-            except (requests.exceptions.Timeout, requests.exceptions.RequestException) as e:
-                print(f"       Tavily search attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2
-                    print(f"      Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"       All {max_retries} attempts failed for query: {query}")
-        return []
+        try:
+            with timed("search_seconds", provider="tavily"):
+                results = self.tavily.call(self._tavily_post, url, payload, timeout)
+            record("search_calls", provider="tavily")
+        except Exception as e:
+            print(f"       Tavily search failed for query '{query}': {e}")
+            return []
+
+        if self.search_cache and results:
+            self.search_cache.set(cache_key, results)
+        return results
+
+    def _tavily_post(self, url: str, payload: Dict, timeout: float) -> List[Dict]:
+        response = requests.post(url, json=payload, timeout=timeout)
+        response.raise_for_status()
+        record("bytes_downloaded", len(response.content), source="tavily")
+        return response.json().get("results", [])
+
+    @staticmethod
+    def _parse_gap_queries(text: str) -> list:
+        gap_queries = json.loads(text)
+        if not isinstance(gap_queries, list):
+            raise ValueError("gap queries are not a JSON list")
+        return gap_queries
 
     def research_trend(self, trend: RawTrend) -> ResearchResult:
         """Gather deep context using multi-source search and recursive gaps detection."""
@@ -69,18 +101,20 @@ class NewsResearcher:
         else:
             if trend.url:
                 try:
+                    from bs4 import BeautifulSoup
                     resp = requests.get(trend.url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+                    record("bytes_downloaded", len(resp.content), source="scrape")
                     soup = BeautifulSoup(resp.content, 'html.parser')
                     text = " ".join([p.get_text() for p in soup.find_all('p')])
                     snippets.append(text[:2000])
                     urls.append(trend.url)
                 except: pass
 
-        context = "\n".join(snippets)
+        context = self.packer.pack(snippets, [trend.title], token_budget=self.gap_token_budget)
         gap_prompt = f"""
         Analyze the following research context about "{trend.title}":
         ---
-        {context[:4000]}
+        {context}
         ---
         Identify any missing critical information (e.g., specific dates, names of key figures, exact statistics, or conflicting reports).
 
@@ -88,12 +122,9 @@ class NewsResearcher:
         If no gaps are found, return an empty list [].
         """
 
+        queries = []
         try:
-            gap_response = self.model.generate_content(
-                gap_prompt,
-                generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-            )
-            gap_queries = json.loads(gap_response.text)
+            gap_queries = self.llm.generate(gap_prompt, parse=self._parse_gap_queries)
 
             for item in gap_queries:
                 query_str = ""
@@ -104,11 +135,19 @@ class NewsResearcher:
 
                 if query_str:
                     print(f"      Filling gap with query: {query_str}")
-                    follow_up = self._tavily_search(query_str, max_results=2)
-                    for res in follow_up:
-                        snippets.append(res.get("content", ""))
-                        if res.get("url") not in urls:
-                            urls.append(res.get("url", ""))
+                    queries.append(query_str)
+
+            if self.concurrent and len(queries) > 1:
+                with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+                    follow_ups = list(pool.map(in_context(lambda q: self._tavily_search(q, max_results=2)), queries))
+            else:
+                follow_ups = [self._tavily_search(q, max_results=2) for q in queries]
+
+            for follow_up in follow_ups:
+                for res in follow_up:
+                    snippets.append(res.get("content", ""))
+                    if res.get("url") not in urls:
+                        urls.append(res.get("url", ""))
         except Exception as e:
             print(f"Gap detection/follow-up failed: {e}")
 
@@ -116,11 +155,7 @@ class NewsResearcher:
             trend_title=trend.title,
             content_snippets=snippets,
             source_urls=list(set(urls)),
-            trend_score=trend.relevance_score
+            trend_score=trend.relevance_score,
+            # Packed once here and shared by generation and verification
+            packed_context=self.packer.pack(snippets, [trend.title] + queries)
         )
-
-    def research_all(self, trends: List[RawTrend]) -> List[ResearchResult]:
-        results = []
-        for trend in trends:
-            results.append(self.research_trend(trend))
-        return results
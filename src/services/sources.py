@@ -0,0 +1,52 @@
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+DEFAULT_SOURCES = {
+    "US": [
+        {"type": "newsapi", "query": "trending US news"},
+        {"type": "rss", "url": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"}
+    ],
+    "India": [
+        {"type": "newsapi", "query": "trending India news"},
+        {"type": "rss", "url": "https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en"}
+    ],
+    "Global": [
+        {"type": "newsapi", "query": "global news trends"},
+        {"type": "rss", "url": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"}
+    ]
+}
+
+class SourceSpec(BaseModel):
+    type: Literal["rss", "newsapi"]
+    url: Optional[str] = None
+    query: Optional[str] = None
+    name: Optional[str] = None
+    max_items: int = 10
+    priority: int = 1
+
+    @property
+    def key(self) -> str:
+        """Identity used to fetch a source only once, however many regions list it."""
+        return self.url if self.type == "rss" else f"newsapi:{self.query}"
+
+class SourceRegistry:
+    """Maps regions to the feeds and APIs they are ingested from."""
+
+    def __init__(self, regions: Dict[str, List[SourceSpec]], default_region: str = "Global"):
+        self.regions = regions
+        self.default_region = default_region
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SourceRegistry":
+        raw = config.get("sources") or DEFAULT_SOURCES
+        regions = {region: [SourceSpec(**spec) for spec in specs] for region, specs in raw.items()}
+        return cls(regions, default_region=config.get("default_region", "Global"))
+
+    def for_region(self, region: str) -> List[SourceSpec]:
+        """Sources for a region, highest priority (lowest number) first, duplicates collapsed."""
+        specs = self.regions.get(region) or self.regions.get(self.default_region, [])
+        unique: Dict[str, SourceSpec] = {}
+        for spec in sorted(specs, key=lambda s: s.priority):
+            if spec.key not in unique:
+                unique[spec.key] = spec
+        return list(unique.values())
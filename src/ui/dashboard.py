@@ -1,33 +1,126 @@
 import streamlit as st
 import json
 import os
-import subprocess
+import sys
+import time
+import requests
 from datetime import datetime
 
+# `streamlit run src/ui/dashboard.py` only puts src/ui on the path; the pipeline package lives at the repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.core.runner import OUTPUT_PATH, build_output, write_output
+from src.core.models import PipelineOutput
+
+# When set, runs go to the REST API (e.g. http://localhost:8000) instead of an in-process worker
+API_URL = os.getenv("NEWSPIPELINE_API_URL", "").rstrip("/")
+
 st.set_page_config(page_title="NewsAgent Dashboard", page_icon="", layout="wide")
 
+@st.cache_resource
+def get_job_manager():
+    """One long-lived worker per dashboard server: the graph is imported and compiled once, not per run."""
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(ROOT, ".env"))
+    from src.core.jobs import JobManager
+    return JobManager(max_workers=1)
+
+@st.cache_data
+def load_output(path: str, mtime: float) -> dict:
+    # `mtime` is only part of the cache key: a new run rewrites the file and invalidates the entry
+    with open(path, "r") as f:
+        return json.load(f)
+
+def submit_run(region: str) -> str:
+    if API_URL:
+        response = requests.post(f"{API_URL}/jobs", params={"region": region}, timeout=10)
+        response.raise_for_status()
+        return response.json()["job_id"]
+    return get_job_manager().submit(region).id
+
+def job_status(job_id: str) -> dict:
+    if API_URL:
+        response = requests.get(f"{API_URL}/jobs/{job_id}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    job = get_job_manager().get(job_id)
+    return job.snapshot().model_dump() if job else {"status": "failed", "error": "Job no longer available", "events": []}
+
+def save_result(job_id: str, status: dict) -> None:
+    """Write a finished job's articles to the same output.json the CLI writes, so they show up below."""
+    if API_URL:
+        result = status.get("result")
+        if result:
+            write_output(PipelineOutput.model_validate(result), OUTPUT_PATH)
+        return
+    job = get_job_manager().get(job_id)
+    if job and job.final_state is not None:
+        elapsed = (job.status.finished_at or time.time()) - (job.status.started_at or job.status.created_at)
+        write_output(build_output(job.final_state, elapsed), OUTPUT_PATH)
+
+def describe(event: dict) -> str:
+    stamp = datetime.fromtimestamp(event["at"]).strftime("%H:%M:%S")
+    story = f" — {event['story']}" if event.get("story") else ""
+    details = ", ".join(f"{k}: {v}" for k, v in (event.get("update") or {}).items() if k != "current_step")
+    return f"`{stamp}` **{event['node']}**{story}" + (f" ({details})" if details else "")
+
 st.title(" Autonomous News Agent")
 st.markdown("A daily autonomous system that identifies trending global events and generates fact-grounded articles.")
 
 st.sidebar.header("Pipeline Controls")
 region = st.sidebar.selectbox("Select Region", ["Global", "US", "India"])
-run_pipeline = st.sidebar.button(" Run Pipeline")
+active_job = st.session_state.get("job_id")
+run_pipeline = st.sidebar.button(" Run Pipeline", disabled=bool(active_job))
+st.sidebar.caption(f"Runs via REST API at {API_URL}" if API_URL else "Runs in-process")
 
 if run_pipeline:
-    with st.spinner(f"Running pipeline for {region}... this may take a minute."):
-        try:
-            result = subprocess.run(["python3", "main.py", region], capture_output=True, text=True)
-            if result.returncode == 0:
-                st.success(f"Pipeline executed successfully for {region}!")
-            else:
-                st.error(f"Pipeline failed: {result.stderr}")
-        except Exception as e:
-            st.error(f"Error running pipeline: {e}")
-
-output_path = "data/output.json"
-if os.path.exists(output_path):
-    with open(output_path, "r") as f:
-        data = json.load(f)
+    try:
+        st.session_state["job_id"] = submit_run(region)
+        st.session_state["job_region"] = region
+        st.rerun()
+    except Exception as e:
+        st.error(f"Error running pipeline: {e}")
+
+@st.fragment(run_every=2)
+def progress_panel():
+    """Polls only this fragment while a run is in flight, so the rest of the page stays interactive."""
+    job_id = st.session_state.get("job_id")
+    if not job_id:
+        return
+    try:
+        status = job_status(job_id)
+    except Exception as e:
+        st.warning(f"Could not reach the pipeline: {e}")
+        return
+
+    region_name = st.session_state.get("job_region", "")
+    events = status.get("events", [])
+    if status["status"] in ("queued", "running"):
+        st.info(f"Running pipeline for {region_name}... current stage: {status.get('current_node') or 'starting'}")
+    with st.expander(f"Progress ({len(events)} steps)", expanded=status["status"] == "running"):
+        for event in events[-30:]:
+            st.markdown(describe(event))
+
+    if status["status"] == "succeeded":
+        save_result(job_id, status)
+        st.session_state.pop("job_id", None)
+        st.session_state["last_message"] = ("success", f"Pipeline executed successfully for {region_name}!")
+        st.rerun()
+    elif status["status"] == "failed":
+        st.session_state.pop("job_id", None)
+        st.session_state["last_message"] = ("error", f"Pipeline failed: {status.get('error')}")
+        st.rerun()
+
+progress_panel()
+
+message = st.session_state.pop("last_message", None)
+if message:
+    (st.success if message[0] == "success" else st.error)(message[1])
+
+if os.path.exists(OUTPUT_PATH):
+    data = load_output(OUTPUT_PATH, os.path.getmtime(OUTPUT_PATH))
 
     st.divider()
     col1, col2 = st.columns([1, 1])
@@ -49,7 +142,3 @@ if os.path.exists(output_path):
                 st.markdown(f"- [{source}]({source})")
 else:
     st.info("No output data found. Run the pipeline to generate articles.")
-
-if run_pipeline and 'result' in locals():
-    with st.expander("Show Console Output"):
-        st.code(result.stdout)
@@ -0,0 +1,52 @@
+import os
+import json
+import multiprocessing
+
+from src.core.models import RawTrend
+from src.core.history import HistoryStore
+from src.core.coverage_index import CoverageIndex
+
+def _record(tmp_path, titles):
+    store = HistoryStore(str(tmp_path / "history.sqlite"), legacy_path=None)
+    store.record([RawTrend(title=t, source="X") for t in titles])
+    CoverageIndex(str(tmp_path / "index"), store).sync()
+
+def test_writers_do_not_drop_each_others_stories(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"), legacy_path=None)
+    store.record([RawTrend(title="Seed story about a harbour strike", source="X")])
+    a = CoverageIndex(str(tmp_path / "index"), store)
+    b = CoverageIndex(str(tmp_path / "index"), store)
+    a.similarity(["anything"])
+    b.similarity(["anything"])
+
+    store.record([RawTrend(title="Floods displace thousands in southern Brazil", source="X"),
+                  RawTrend(title="Central bank holds interest rates steady", source="X")])
+    a.sync()
+    store.record([RawTrend(title="Chipmaker shares slide on export controls", source="X")])
+    b.sync()
+
+    reopened = CoverageIndex(str(tmp_path / "index"), store)
+    assert len(reopened) == 4
+    scores = reopened.similarity(["Floods displace thousands in southern Brazil",
+                                  "Chipmaker shares slide on export controls"])
+    assert (scores > 0.99).all()
+
+def test_concurrent_processes(tmp_path):
+    batches = [[f"Story {i} about topic {i} number {i * 7}" for i in range(n, n + 5)] for n in range(0, 40, 5)]
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.starmap(_record, [(tmp_path, batch) for batch in batches])
+    store = HistoryStore(str(tmp_path / "history.sqlite"), legacy_path=None)
+    # Every process synced after recording, so the cache on disk already holds all of them
+    assert len(CoverageIndex(str(tmp_path / "index"), store)) == 40
+
+def test_unreadable_cache_is_rebuilt(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"), legacy_path=None)
+    store.record([RawTrend(title="Dockworkers strike halts cargo at ports", source="X")])
+    CoverageIndex(str(tmp_path / "index"), store).sync()
+    with open(os.path.join(tmp_path, "index", "meta.json"), "w") as f:
+        json.dump({"rows": 99, "nnz": 999, "n_features": 2 ** 18, "last_id": 1}, f)
+
+    index = CoverageIndex(str(tmp_path / "index"), store)
+    index.sync()
+    # Cache claims more rows than its arrays hold: load fails, and the rows come back from the store
+    assert index.similarity(["Dockworkers strike halts cargo at ports"])[0] > 0.99
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.core.models import RawTrend
+from src.core.deduplication import (
+    _jaccard, _lsh_candidates, _shingles, cluster_trends, deduplicate_trends, lsh_bands, minhash_signatures
+)
+
+SLOTS = ["subject", "verb", "adjective", "object", "place"]
+SOURCES = ["Reuters", "AP", "BBC News", "Bloomberg"]
+
+def _trends(count, duplicate_rate=0.2, seed=0):
+    """Five-word headlines from 30 words per slot; about `duplicate_rate` re-run an earlier one elsewhere."""
+    rng = random.Random(seed)
+    titles = []
+    while len(titles) < count:
+        if titles and rng.random() < duplicate_rate:
+            titles.append(rng.choice(titles).split(" - ")[0])
+        else:
+            titles.append(" ".join(f"{slot}{rng.randrange(30)}" for slot in SLOTS))
+    return [RawTrend(title=f"{title} - {rng.choice(SOURCES)}", source="X", url=f"https://example.test/{i}")
+            for i, title in enumerate(titles)]
+
+def test_bands_follow_threshold():
+    assert lsh_bands(64, 0.5) == 16
+    assert lsh_bands(64, 0.8) == 8
+    assert lsh_bands(64, 0.3) == 32
+
+def test_bands_must_divide_num_perm():
+    signatures = minhash_signatures(["a b c", "a b d"], num_perm=64)
+    with pytest.raises(ValueError):
+        _lsh_candidates(signatures, 24)
+
+def test_candidate_pairs_stay_near_linear():
+    titles = [t.title for t in _trends(8000)]
+    candidates = _lsh_candidates(minhash_signatures(titles), lsh_bands(64, 0.5))
+    # About 4 per headline at 16 x 4; the old 32 x 2 banding proposed over two hundred
+    assert len(candidates) < 10 * len(titles)
+
+def test_duplicates_collapse():
+    trends = [RawTrend(title="Central bank raises interest rates again - Reuters", source="Reuters"),
+              RawTrend(title="Central bank raises interest rates again - BBC News", source="BBC"),
+              RawTrend(title="Floods displace thousands in southern Brazil", source="AP")]
+    unique = deduplicate_trends(trends)
+    assert [t.source for t in unique] == ["Reuters", "AP"]
+    assert unique[0].cluster_size == 2
+
+def test_clusters_do_not_chain():
+    # B shares enough words with A and with C, but A and C are different stories
+    titles = ["Investors boost joint reforms in Ankara",
+              "Investors boost joint budget in Ankara",
+              "Teachers boost joint budget in Ankara",
+              "Teachers block joint budget in Ankara"]
+    trends = [RawTrend(title=t, source="X") for t in titles]
+    for cluster in cluster_trends(trends):
+        leader = _shingles(cluster[0].title)
+        assert all(_jaccard(leader, _shingles(t.title)) >= 0.5 for t in cluster)
+    assert len(cluster_trends(trends)) > 1
+
+def test_large_input_clusters_are_coherent():
+    for cluster in cluster_trends(_trends(5000)):
+        leader = _shingles(cluster[0].title)
+        assert all(_jaccard(leader, _shingles(t.title)) >= 0.5 for t in cluster[1:])
@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import llm
+from src.core.cache import DiskCache
+
+class ScriptedModel:
+    """Returns the given responses in order, one per call."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        return SimpleNamespace(text=self.responses.pop(0), usage_metadata=None)
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "_genai", lambda: SimpleNamespace(types=SimpleNamespace(GenerationConfig=dict)))
+    monkeypatch.delenv(llm.NO_CACHE_ENV, raising=False)
+    return llm.LLMClient("verification", cache=DiskCache(str(tmp_path / "llm_cache.sqlite")))
+
+def parse_verdict(text):
+    return json.loads(text)["hallucination_check"]
+
+def test_responses_rejected_by_the_caller_are_not_cached(client):
+    client._model = ScriptedModel(['{"claims": []}', '{"hallucination_check": "Pass"}'])
+
+    with pytest.raises(KeyError):
+        client.generate("verify this", parse=parse_verdict)
+    assert client.generate("verify this", parse=parse_verdict) == "Pass"
+    assert client.generate("verify this", parse=parse_verdict) == "Pass"
+    assert client._model.calls == 2
+
+def test_unusable_cache_entries_are_refreshed(client):
+    client._model = ScriptedModel(['{"claims": []}', '{"hallucination_check": "Fail"}'])
+
+    # Cached under the old, looser check
+    assert client.generate("verify this") == '{"claims": []}'
+    assert client.generate("verify this", parse=parse_verdict) == "Fail"
+    assert client.generate("verify this", parse=parse_verdict) == "Fail"
+    assert client._model.calls == 2